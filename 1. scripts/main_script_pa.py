@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import os
+import sys
 import time
 import requests
 import pandas as pd
@@ -9,6 +10,13 @@ from collections import deque
 # assume this script lives in ~/yomp/1. scripts/
 BASE_DIR       = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # e.g. BASE_DIR == "/home/yourusername/yomp"
+sys.path.insert(0, os.path.join(BASE_DIR, "5. analysis"))
+sys.path.insert(0, BASE_DIR)
+from profiling import section, add_rows
+from adp_sketch import AdpStore, ADP_SKETCH_NPZ
+from common import format_key
+from seasons import SEASONS, user_leagues, season_of, previous_league_id
+from user_graph import EdgeLog
 
 # ─── PATHS ───────────────────────────────────────────────────────────────────
 PRE_SAVED_CSV       = os.path.join(BASE_DIR, "2. league_ids", "master_league_ids.csv")
@@ -21,7 +29,6 @@ ALREADY_DONE_CSV    = os.path.join(BASE_DIR, "3. raw_data", "already_done.csv")
 OUT_OF_FILTER_CSV   = os.path.join(BASE_DIR, "2. league_ids", "out_of_filter.csv")
 
 # ─── FILTER CRITERIA ──────────────────────────────────────────────────────────
-SEASON         = 2024
 WEEKS          = list(range(1, 18))
 LEAGUE_FILTERS = {
     "total_teams": [10, 12],
@@ -32,77 +39,110 @@ LEAGUE_FILTERS = {
 MAX_DEPTH      = 5
 REQUEST_PAUSE  = 5   # seconds between API calls
 
-# ─── PREPARE DIRECTORIES ──────────────────────────────────────────────────────
-for d in [
-    os.path.join(BASE_DIR, "3. raw_data"),
-    os.path.join(BASE_DIR, "3. raw_data", "matchups")
-]:
-    os.makedirs(d, exist_ok=True)
-
 # ─── LOAD OR INITIALIZE MASTER DATAFRAMES ────────────────────────────────────
 def load_master(path, cols):
     return pd.read_csv(path) if os.path.exists(path) else pd.DataFrame(columns=cols)
 
 master_info_cols    = ["league_id"]  # plus whatever scoring/settings columns you expect
-master_drafts_cols  = ["league_id","draft_id","draft_slot","pick_no","is_keeper","player_id","position","picked_by"]
+master_drafts_cols  = ["league_id","draft_id","draft_slot","pick_no","is_keeper","player_id","position","picked_by","draft_time","season"]
 master_matchups_cols= []  # will infer on first write
 
-master_info     = load_master(MASTER_INFO_CSV,    master_info_cols)
-master_drafts   = load_master(MASTER_DRAFTS_CSV,  master_drafts_cols)
-master_matchups = load_master(MASTER_MATCHUPS_CSV, master_matchups_cols)
-
-# Ensure league_id columns are string type
-for df in (master_info, master_drafts, master_matchups):
-    if "league_id" in df.columns:
-        df["league_id"] = df["league_id"].astype(str)
-
 # ─── TRACKERS ─────────────────────────────────────────────────────────────────
+# filled by load_state() when the crawl starts, so importing this module reads nothing
+master_info = master_drafts = master_matchups = None
+adp_store = edges = None
+already_done = set()
+
 visited_leagues = set()
 visited_users   = set()
 out_of_filter   = set()
-
-already_done = (
-    set(pd.read_csv(ALREADY_DONE_CSV)["league_id"].astype(str))
-    if os.path.exists(ALREADY_DONE_CSV)
-    else set()
-)
+league_seasons  = {}
 
 # ─── QUEUES & COUNTERS ─────────────────────────────────────────────────────────
-league_queue = deque(pd.read_csv(PRE_SAVED_CSV)["league_id"].astype(str))
+league_queue = deque()
 user_queue   = deque()
-attempts = successes = 0
+
+def load_state():
+    global master_info, master_drafts, master_matchups, adp_store, edges, already_done
+
+    for d in [
+        os.path.join(BASE_DIR, "3. raw_data"),
+        os.path.join(BASE_DIR, "3. raw_data", "matchups")
+    ]:
+        os.makedirs(d, exist_ok=True)
+
+    master_info     = load_master(MASTER_INFO_CSV,    master_info_cols)
+    master_drafts   = load_master(MASTER_DRAFTS_CSV,  master_drafts_cols)
+    master_matchups = load_master(MASTER_MATCHUPS_CSV, master_matchups_cols)
+
+    # Ensure league_id columns are string type
+    for df in (master_info, master_drafts, master_matchups):
+        if "league_id" in df.columns:
+            df["league_id"] = df["league_id"].astype(str)
+
+    adp_store = AdpStore.load(ADP_SKETCH_NPZ)
+    # user <-> league edges; lookups made by earlier runs are replayed instead of re-requested
+    edges = EdgeLog()
+
+    already_done = (
+        set(pd.read_csv(ALREADY_DONE_CSV)["league_id"].astype(str))
+        if os.path.exists(ALREADY_DONE_CSV)
+        else set()
+    )
+    league_queue.extend(pd.read_csv(PRE_SAVED_CSV)["league_id"].astype(str))
 
 # ─── HELPERS ──────────────────────────────────────────────────────────────────
 def safe_get_json(url, params=None):
     try:
-        r = requests.get(url, params=params, timeout=10)
-        r.raise_for_status()
-        return r.json()
+        with section("http"):
+            r = requests.get(url, params=params, timeout=10)
+            r.raise_for_status()
+            return r.json()
     except Exception as e:
         print(f"[ERROR] GET {url} → {e}")
         return None
 
-def explore_league_for_users(league_id):
+def pause(seconds):
+    with section("sleep"):
+        time.sleep(seconds)
+
+def fetch_owners(league_id):
     data = safe_get_json(f"https://api.sleeper.app/v1/league/{league_id}/rosters")
-    time.sleep(REQUEST_PAUSE)
-    return [r.get("owner_id") for r in data or [] if r.get("owner_id")]
+    pause(REQUEST_PAUSE)
+    if data is None:
+        return None
+    return [r.get("owner_id") for r in data if r.get("owner_id")]
+
+def explore_league_for_users(league_id):
+    league = {"league_id": league_id, "season": league_seasons.get(league_id)}
+    owners, _ = edges.owners(league, lambda: fetch_owners(league_id))
+    return owners
 
 def get_user_leagues(user_id):
-    data = safe_get_json(f"https://api.sleeper.app/v1/user/{user_id}/leagues/nfl/{SEASON}")
-    time.sleep(REQUEST_PAUSE)
-    return [l.get("league_id") for l in data or []]
+    # every requested season no earlier run looked up, one paced request at a time
+    leagues, _ = edges.user_leagues(user_id, lambda missing: user_leagues(
+        user_id, safe_get_json, missing, pause=lambda: pause(REQUEST_PAUSE)))
+    return [str(l["league_id"]) for l in leagues]
 
 # ─── FETCH & APPEND LEAGUE DATA ─────────────────────────────────────────────────
 def fetch_and_append_league_data(league_id):
     global master_info, master_drafts
 
     li = safe_get_json(f"https://api.sleeper.app/v1/league/{league_id}")
-    time.sleep(REQUEST_PAUSE)
-    if not li or not (draft_id := li.get("draft_id")):
+    pause(REQUEST_PAUSE)
+    if not li:
+        return False
+    # follow dynasty/keeper chains back through the requested seasons
+    season = season_of(li)
+    league_seasons[league_id] = season
+    prev = previous_league_id(li)
+    if prev and prev not in visited_leagues and (season or 0) > min(SEASONS):
+        league_queue.append(prev)
+    if season not in SEASONS or not (draft_id := li.get("draft_id")):
         return False
 
     ds = safe_get_json(f"https://api.sleeper.app/v1/draft/{draft_id}")
-    time.sleep(REQUEST_PAUSE)
+    pause(REQUEST_PAUSE)
     if not ds:
         return False
 
@@ -120,10 +160,14 @@ def fetch_and_append_league_data(league_id):
     ], axis=1)
     info_df["league_id"] = league_id
     info_df["league_id"] = info_df["league_id"].astype(str)
+    info_df["season"] = season
+    info_df["previous_league_id"] = prev
 
     if league_id not in master_info["league_id"].values:
-        master_info = pd.concat([master_info, info_df], ignore_index=True)
-        master_info.to_csv(MASTER_INFO_CSV, index=False)
+        with section("concat"):
+            master_info = pd.concat([master_info, info_df], ignore_index=True)
+        with section("to_csv"):
+            master_info.to_csv(MASTER_INFO_CSV, index=False)
 
     # Draft
     raw_picks = ds.get("picks") or safe_get_json(f"https://api.sleeper.app/v1/draft/{draft_id}/picks")
@@ -139,82 +183,110 @@ def fetch_and_append_league_data(league_id):
             "player_id":    m.get("player_id"),
             "position":     m.get("position"),
             "picked_by":    p.get("picked_by"),
+            "draft_time":   ds.get("start_time"),
+            "season":       season,
         })
     draft_df = pd.DataFrame(picks)
     # Ensure league_id exists even if picks list was empty
     draft_df["league_id"] = league_id
     draft_df["league_id"] = draft_df["league_id"].astype(str)
 
-    combined = pd.concat([master_drafts, draft_df], ignore_index=True)
-    combined.drop_duplicates(subset=["league_id","pick_no"], keep="first", inplace=True)
+    new_picks = league_id not in master_drafts["league_id"].values
+    with section("concat"):
+        combined = pd.concat([master_drafts, draft_df], ignore_index=True)
+        combined.drop_duplicates(subset=["league_id","pick_no"], keep="first", inplace=True)
     master_drafts = combined
-    master_drafts.to_csv(MASTER_DRAFTS_CSV, index=False)
+    with section("to_csv"):
+        master_drafts.to_csv(MASTER_DRAFTS_CSV, index=False)
+    add_rows(len(draft_df))
+
+    # ADP sketches follow the persisted picks, no full recompute needed; saved once per depth
+    if new_picks:
+        with section("adp_sketch"):
+            adp_store.update(draft_df, format_key(info_df))
 
     return True
 
+def save_adp_store():
+    with section("adp_sketch"):
+        adp_store.save(ADP_SKETCH_NPZ)
+
 # ─── FETCH & APPEND MATCHUPS ───────────────────────────────────────────────────
 def fetch_and_append_matchups(league_id):
     global master_matchups, already_done
 
+    season = league_seasons.get(league_id)
     rows = []
     for wk in WEEKS:
         data = safe_get_json(
             f"https://api.sleeper.app/v1/league/{league_id}/matchups/{wk}",
-            params={"season": SEASON}
+            params={"season": season}
         ) or []
         for rec in data:
-            rec["league_id"], rec["week"] = league_id, wk
+            rec["league_id"], rec["week"], rec["season"] = league_id, wk, season
             rows.append(rec)
-        time.sleep(REQUEST_PAUSE/2)
+        pause(REQUEST_PAUSE/2)
 
     df = pd.DataFrame(rows)
-    master_matchups = pd.concat([master_matchups, df], ignore_index=True)
-    master_matchups.drop_duplicates(subset=["league_id","week","roster_id"], inplace=True)
-    master_matchups.to_csv(MASTER_MATCHUPS_CSV, index=False)
+    with section("concat"):
+        master_matchups = pd.concat([master_matchups, df], ignore_index=True)
+        master_matchups.drop_duplicates(subset=["league_id","week","roster_id"], inplace=True)
+    with section("to_csv"):
+        master_matchups.to_csv(MASTER_MATCHUPS_CSV, index=False)
+    add_rows(len(df))
 
     already_done.add(league_id)
     pd.DataFrame({"league_id": sorted(already_done)}).to_csv(ALREADY_DONE_CSV, index=False)
 
 # ─── MAIN LOOP ────────────────────────────────────────────────────────────────
-depth = 0
-while depth <= MAX_DEPTH:
-    if not league_queue and depth < MAX_DEPTH:
-        depth += 1
-        for uid in list(user_queue):
-            if uid not in visited_users:
-                visited_users.add(uid)
-                for new_lid in get_user_leagues(uid):
-                    if new_lid not in visited_leagues:
-                        league_queue.append(new_lid)
-        continue
-
-    if not league_queue:
-        break
-
-    lid = league_queue.popleft()
-    attempts += 1
-    if lid in visited_leagues:
-        continue
-    if lid in already_done:
-        continue
-    visited_leagues.add(lid)
-
-    for owner in explore_league_for_users(lid):
-        if owner not in visited_users:
-            user_queue.append(owner)
-
-    passed = fetch_and_append_league_data(lid)
-    if passed and lid not in already_done:
-        successes += 1
-        fetch_and_append_matchups(lid)
-        status = "✔"
-    else:
-        status = "✖"
-
-    print(f"[{successes}/{attempts}] {status} League {lid}")
-
-# ─── WRAP UP ─────────────────────────────────────────────────────────────────
-pd.DataFrame({"league_id": sorted(out_of_filter)}) \
-  .to_csv(OUT_OF_FILTER_CSV, index=False)
-
-print(f"\n🎉 Done: {successes}/{attempts} leagues passed filters.")
\ No newline at end of file
+def main():
+    load_state()
+    attempts = successes = 0
+    depth = 0
+    while depth <= MAX_DEPTH:
+        if not league_queue and depth < MAX_DEPTH:
+            save_adp_store()
+            depth += 1
+            for uid in list(user_queue):
+                if uid not in visited_users:
+                    visited_users.add(uid)
+                    for new_lid in get_user_leagues(uid):
+                        if new_lid not in visited_leagues:
+                            league_queue.append(new_lid)
+            continue
+
+        if not league_queue:
+            break
+
+        lid = league_queue.popleft()
+        attempts += 1
+        if lid in visited_leagues:
+            continue
+        if lid in already_done:
+            continue
+        visited_leagues.add(lid)
+
+        # league info first: it sets league_seasons, which tags the roster edges
+        passed = fetch_and_append_league_data(lid)
+        for owner in explore_league_for_users(lid):
+            if owner not in visited_users:
+                user_queue.append(owner)
+
+        if passed and lid not in already_done:
+            successes += 1
+            fetch_and_append_matchups(lid)
+            status = "✔"
+        else:
+            status = "✖"
+
+        print(f"[{successes}/{attempts}] {status} League {lid}")
+
+    # ─── WRAP UP ─────────────────────────────────────────────────────────────────
+    save_adp_store()
+    pd.DataFrame({"league_id": sorted(out_of_filter)}) \
+      .to_csv(OUT_OF_FILTER_CSV, index=False)
+
+    print(f"\n🎉 Done: {successes}/{attempts} leagues passed filters, {edges.replayed} lookups replayed.")
+
+if __name__ == "__main__":
+    main()
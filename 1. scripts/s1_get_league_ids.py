@@ -1,10 +1,16 @@
-import requests, time, os
+import requests, time, os, sys
 import pandas as pd
+from itertools import chain
 
 # ─── CONFIG ─────────────────────────────────────────
-MASTER_CSV = "crawled_leagues2.csv"
-OUTPUT_CSV = "crawled_leagues3.csv"
-SEASON = 2024
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from profiling import section, add_rows
+from seasons import SEASONS, LEAGUE_URL, user_leagues, league_history, league_row
+from user_graph import EdgeLog, SEED_CSV
+LEAGUE_IDS_DIR = os.path.join(BASE_DIR, "2. league_ids")
+HAND_KEPT_CSV = os.path.join(LEAGUE_IDS_DIR, "crawled_leagues2.csv")
+OUTPUT_CSV = os.path.join(LEAGUE_IDS_DIR, "crawled_leagues3.csv")
 MAX_DEPTH = 5
 SLEEP_TIME = 2
 
@@ -13,50 +19,75 @@ visited_leagues = set()
 visited_users = set()
 user_queue = []
 
-# Load seeds from input CSV
+# Load seeds from input CSV; seeds picked by user_graph.py take over from the hand-kept list once they exist
 def load_seeds():
-    df = pd.read_csv(MASTER_CSV)
+    path = SEED_CSV if os.path.exists(SEED_CSV) else HAND_KEPT_CSV
+    df = pd.read_csv(path)
     seeds = df["league_id"].dropna().unique().tolist()
-    print(f"🧪 Loaded {len(seeds)} seed leagues")
+    print(f"🧪 Loaded {len(seeds)} seed leagues from {os.path.basename(path)}")
     return seeds
 
+def pause():
+    with section("sleep"):
+        time.sleep(SLEEP_TIME)
+
 # Robust request with error handling
 def safe_request(url):
     try:
-        res = requests.get(url, timeout=10)
-        res.raise_for_status()
-        return res.json()
+        with section("http"):
+            res = requests.get(url, timeout=10)
+            res.raise_for_status()
+            return res.json()
     except Exception as e:
         print(f"[ERROR] {url} → {e}")
         return None
 
-# Explore a single league and get its owners
-def explore_league(league_id, df):
+# Explore a single league (a league dict with league_id, season, previous_league_id) and get its owners
+def explore_league(league, df, edges):
+    league_id = str(league["league_id"])
     if league_id in visited_leagues:
         return [], df
-    print(f"▶ Exploring league: {league_id}")
+    print(f"▶ Exploring league: {league_id} ({league.get('season')})")
     visited_leagues.add(league_id)
 
     # Append new row and save CSV
-    df = pd.concat([df, pd.DataFrame([{"league_id": league_id}])], ignore_index=True)
-    df.to_csv(OUTPUT_CSV, index=False)
+    with section("concat"):
+        df = pd.concat([df, pd.DataFrame([league_row(league)])], ignore_index=True)
+    with section("to_csv"):
+        df.to_csv(OUTPUT_CSV, index=False)
+    add_rows(1)
+
+    owners, _ = edges.owners(league, lambda: fetch_owners(league_id))
+    return owners, df
 
+def fetch_owners(league_id):
     data = safe_request(f"https://api.sleeper.app/v1/league/{league_id}/rosters")
-    time.sleep(SLEEP_TIME)
-    if not data:
-        return [], df
-    return [r.get("owner_id") for r in data if r.get("owner_id")], df
+    pause()
+    if data is None:
+        return None
+    return [r.get("owner_id") for r in data if r.get("owner_id")]
 
-# Get all leagues for a user
-def get_user_leagues(user_id):
-    data = safe_request(f"https://api.sleeper.app/v1/user/{user_id}/leagues/nfl/{SEASON}")
-    time.sleep(SLEEP_TIME)
-    return [l["league_id"] for l in data] if data else []
+# Get all leagues for a user across the requested seasons, pausing after each request
+def get_user_leagues(user_id, edges):
+    leagues, _ = edges.user_leagues(user_id, lambda missing: user_leagues(user_id, safe_request, missing, pause=pause))
+    return leagues
+
+# Explore a league and its earlier seasons, queueing new owners
+def explore_with_history(league, df, queue, edges):
+    for lg in chain([league], league_history(league, safe_request, visited_leagues, pause=pause)):
+        uids, df = explore_league(lg, df, edges)
+        for uid in uids:
+            if uid not in visited_users:
+                visited_users.add(uid)
+                queue.append(uid)
+    return df
 
 # Main crawler
 def spider():
     seeds = load_seeds()
-    print(f"🔁 Starting spider with {len(seeds)} seeds")
+    # every rosters / user-leagues lookup is logged; ones made by earlier runs are replayed
+    edges = EdgeLog()
+    print(f"🔁 Starting spider with {len(seeds)} seeds, seasons {SEASONS}")
 
     # Initialize or load the DataFrame
     if os.path.exists(OUTPUT_CSV):
@@ -64,34 +95,32 @@ def spider():
     else:
         df = pd.DataFrame(columns=["league_id"])
 
-    # Start from seeds
+    # Start from seeds; their season and previous_league_id come from the league itself
     for lid in seeds:
-        uids, df = explore_league(lid, df)
-        for uid in uids:
-            if uid not in visited_users:
-                visited_users.add(uid)
-                user_queue.append(uid)
+        seed = safe_request(LEAGUE_URL.format(league_id=lid)) or {"league_id": lid}
+        pause()
+        df = explore_with_history(seed, df, user_queue, edges)
 
     # Depth-based crawl
     for depth in range(1, MAX_DEPTH + 1):
         print(f"\n🌐 Depth {depth}/{MAX_DEPTH} | Users in queue: {len(user_queue)}")
         next_queue = []
         for uid in user_queue:
-            for lid in get_user_leagues(uid):
-                if lid not in visited_leagues:
-                    new_uids, df = explore_league(lid, df)
-                    for new_uid in new_uids:
-                        if new_uid not in visited_users:
-                            visited_users.add(new_uid)
-                            next_queue.append(new_uid)
+            for league in get_user_leagues(uid, edges):
+                if str(league["league_id"]) not in visited_leagues:
+                    df = explore_with_history(league, df, next_queue, edges)
         if not next_queue:
             print("✅ No new users found—stopping early.")
             break
         user_queue[:] = next_queue
+    print(f"♻️ {edges.replayed} lookups replayed from {os.path.basename(edges.path)}")
 
-if __name__ == "__main__":
+def main():
     try:
         spider()
         print("🎉 Spidering complete!")
     except KeyboardInterrupt:
-        print("⚠️ Interrupted — progress saved live to CSV.")
\ No newline at end of file
+        print("⚠️ Interrupted — progress saved live to CSV.")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
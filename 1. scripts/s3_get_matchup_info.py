@@ -1,60 +1,102 @@
-import requests, time, os
+import requests, time, os, sys
 import pandas as pd
 import ast
 
 # ─── SETUP ────────────────────────────────────────────────────────────
 SLEEP_SEC       = 5
-LEAGUE_IDS_DIR  = '2. league_ids'
-RAW_DATA_DIR    = '3. raw_data'
+BASE_DIR        = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from profiling import section, add_rows
+from seasons import SEASONS
+LEAGUE_IDS_DIR  = os.path.join(BASE_DIR, '2. league_ids')
+RAW_DATA_DIR    = os.path.join(BASE_DIR, '3. raw_data')
 MATCHUPS_DIR    = os.path.join(RAW_DATA_DIR, 'matchups')
+ALREADY_DONE_CSV = os.path.join(MATCHUPS_DIR, 'already_done.csv')
+
+weeks  = list(range(1, 18))  # weeks 1–17
 # ──────────────────────────────────────────────────────────────────────
 
-# load your inputs
-master_league_ids = pd.read_csv(os.path.join(LEAGUE_IDS_DIR, 'master_league_ids.csv'))
-out_of_filter     = pd.read_csv(os.path.join(LEAGUE_IDS_DIR, 'out_of_filter.csv'))
-already_done_df   = pd.read_csv(os.path.join(MATCHUPS_DIR, 'already_done.csv'))
+def load_looping_league_ids():
+    # load your inputs
+    master_league_ids = pd.read_csv(os.path.join(LEAGUE_IDS_DIR, 'master_league_ids.csv'))
+    out_of_filter     = pd.read_csv(os.path.join(LEAGUE_IDS_DIR, 'out_of_filter.csv'))
+    already_done_df   = (
+        pd.read_csv(ALREADY_DONE_CSV) if os.path.exists(ALREADY_DONE_CSV)
+        else pd.DataFrame(columns=['league_id'])
+    )
 
-# compute which leagues to process
-looping_league_ids = master_league_ids[
-    ~master_league_ids['league_id'].isin(out_of_filter['league_id']) &
-    ~master_league_ids['league_id'].isin(already_done_df['league_id'])
-]
+    # compute which leagues to process
+    looping_league_ids = master_league_ids[
+        ~master_league_ids['league_id'].isin(out_of_filter['league_id']) &
+        ~master_league_ids['league_id'].isin(already_done_df['league_id'])
+    ]
+    return looping_league_ids, already_done_df
 
-season = 2024
-weeks  = list(range(1, 18))  # weeks 1–17
+def league_season(league_id, master_season=None):
+    # s1/s2 tag seasons on the ids; older id files fall back to s2's per-league info file
+    if pd.notna(master_season):
+        return int(master_season)
+    info_file = os.path.join(RAW_DATA_DIR, 'info', f"{league_id}.csv")
+    if os.path.exists(info_file):
+        season = pd.read_csv(info_file, usecols=lambda c: c == 'season')
+        if 'season' in season and season['season'].notna().any():
+            return int(season['season'].dropna().iat[0])
+    return None
 
 # ─── PROCESS ──────────────────────────────────────────────────────────
-for league_id in looping_league_ids['league_id']:
-    print(f"▶ Processing league {league_id}")
+def fetch_league_matchups(league_id, season=None):
     all_matchups = []
 
     # fetch each week
     for week in weeks:
         url    = f"https://api.sleeper.app/v1/league/{league_id}/matchups/{week}"
-        params = {"season": season}
-        resp   = requests.get(url, params=params)
-        resp.raise_for_status()
-        data   = resp.json() or []
+        params = {"season": season} if season else None
+        with section("http"):
+            resp   = requests.get(url, params=params)
+            resp.raise_for_status()
+            data   = resp.json() or []
 
         # annotate & collect
         for entry in data:
             entry["week"] = week
+            entry["season"] = season
             all_matchups.append(entry)
 
-        time.sleep(0.5)  # per‐week backoff
+        with section("sleep"):
+            time.sleep(0.5)  # per‐week backoff
+
+    return pd.DataFrame(all_matchups)
 
-    # write out this league's raw matchups
-    df       = pd.DataFrame(all_matchups)
-    out_file = os.path.join(MATCHUPS_DIR, f"matchups_{league_id}.csv")
-    df.to_csv(out_file, index=False)
-    print(f"  • Wrote {len(df)} rows to {out_file}")
+def main():
+    os.makedirs(MATCHUPS_DIR, exist_ok=True)
+    looping_league_ids, already_done_df = load_looping_league_ids()
 
-    # mark this league as done
-    already_done_df = pd.concat([
-        already_done_df,
-        pd.DataFrame({'league_id': [league_id]})
-    ], ignore_index=True).drop_duplicates()
-    already_done_df.to_csv(os.path.join(MATCHUPS_DIR, 'already_done.csv'), index=False)
+    seasons = looping_league_ids['season'] if 'season' in looping_league_ids \
+        else pd.Series(None, index=looping_league_ids.index)
+    for league_id, master_season in zip(looping_league_ids['league_id'], seasons):
+        season = league_season(league_id, master_season)
+        if season is not None and season not in SEASONS:
+            continue
+        print(f"▶ Processing league {league_id} ({season})")
+        df = fetch_league_matchups(league_id, season)
+
+        # write out this league's raw matchups
+        out_file = os.path.join(MATCHUPS_DIR, f"matchups_{league_id}.csv")
+        with section("to_csv"):
+            df.to_csv(out_file, index=False)
+        add_rows(len(df))
+        print(f"  • Wrote {len(df)} rows to {out_file}")
+
+        # mark this league as done
+        already_done_df = pd.concat([
+            already_done_df,
+            pd.DataFrame({'league_id': [league_id]})
+        ], ignore_index=True).drop_duplicates()
+        already_done_df.to_csv(ALREADY_DONE_CSV, index=False)
+
+        with section("sleep"):
+            time.sleep(SLEEP_SEC)
+# ──────────────────────────────────────────────────────────────────────
 
-    time.sleep(SLEEP_SEC)
-# ──────────────────────────────────────────────────────────────────────
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+
+# ─── SEASONS ─────────────────────────────────────────────────────────────────
+# which seasons the crawl covers, e.g. SLEEPER_FF_SEASONS="2022 2023 2024 2025"
+# (or `sleeper-ff run crawl --seasons 2022 2023 2024 2025`)
+SEASONS = sorted(int(s) for s in os.environ.get("SLEEPER_FF_SEASONS", "2024").replace(",", " ").split())
+
+USER_LEAGUES_URL = "https://api.sleeper.app/v1/user/{user_id}/leagues/nfl/{season}"
+LEAGUE_URL       = "https://api.sleeper.app/v1/league/{league_id}"
+
+
+def season_of(league):
+    try:
+        return int(league.get("season"))
+    except (TypeError, ValueError):
+        return None
+
+
+def user_leagues(user_id, get_json, seasons=SEASONS, pause=None):
+    """A user's leagues for every requested season.
+
+    Returns (leagues, failed): league dicts (league_id, season, previous_league_id, ...)
+    and the seasons whose request failed (get_json returned None), which are
+    not the same as seasons the user has no leagues in. As in league_history,
+    pause() is called after every request, so more seasons never means a
+    faster request rate.
+    """
+    responses = []
+    for s in seasons:
+        responses.append(get_json(USER_LEAGUES_URL.format(user_id=user_id, season=s)))
+        if pause:
+            pause()
+    leagues = [lg for data in responses for lg in data or [] if lg.get("league_id")]
+    return leagues, [s for s, data in zip(seasons, responses) if data is None]
+
+
+def previous_league_id(league):
+    prev = league.get("previous_league_id")
+    return str(prev) if prev and str(prev) != "0" else None
+
+
+def league_history(league, get_json, seen, seasons=SEASONS, pause=None):
+    """Walk previous_league_id back through the requested seasons.
+
+    Yields the league dict of each earlier season until the chain reaches a
+    league in `seen` (the caller adds what it explores); dynasty/keeper
+    leagues chain one league_id per season. pause() is called after every
+    request, so a long chain keeps to the caller's rate limit.
+    """
+    def earlier(lg):
+        # nothing to fetch once the chain is at the earliest requested season
+        return previous_league_id(lg) if (season_of(lg) or 0) > min(seasons) else None
+
+    prev = earlier(league)
+    while prev and prev not in seen:
+        older = get_json(LEAGUE_URL.format(league_id=prev))
+        if pause:
+            pause()
+        if not older:
+            return
+        if season_of(older) in seasons:
+            yield older
+        prev = earlier(older)
+
+
+def league_row(league):
+    """The season-tagged id row every crawl output keeps."""
+    return {"league_id": str(league["league_id"]),
+            "season": season_of(league),
+            "previous_league_id": previous_league_id(league)}
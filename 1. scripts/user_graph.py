@@ -0,0 +1,339 @@
+import csv
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+# ─── PATHS ───────────────────────────────────────────────────────────────────
+BASE_DIR       = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEAGUE_IDS_DIR = os.path.join(BASE_DIR, "2. league_ids")
+RAW_DATA_DIR   = os.path.join(BASE_DIR, "3. raw_data")
+
+# every rosters / user-leagues lookup the crawl makes is appended here
+EDGE_LOG_CSV   = os.path.join(LEAGUE_IDS_DIR, "user_league_edges.csv")
+USER_GRAPH_NPZ = os.path.join(LEAGUE_IDS_DIR, "user_graph.npz")
+SEED_CSV       = os.path.join(LEAGUE_IDS_DIR, "seed_leagues.csv")
+OUT_OF_FILTER_CSV = os.path.join(LEAGUE_IDS_DIR, "out_of_filter.csv")
+
+sys.path.insert(0, BASE_DIR)
+from profiling import section
+from seasons import SEASONS
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+EDGE_COLS = ["user_id", "league_id", "season", "previous_league_id", "source"]
+# bit (season - FIRST_SEASON) of a user's mask = their leagues for that season were fetched
+FIRST_SEASON = 2017
+LAST_SEASON = FIRST_SEASON + 63
+K_HOPS = 2
+N_SEEDS = 25
+# seeds are picked among the best-connected leagues
+CANDIDATES = 5000
+# candidates expanded per reach() call; memory scales with this, not with CANDIDATES
+REACH_CHUNK = 250
+
+
+def _ids(col):
+    """Sleeper ids are numeric strings; uint64 keeps them exact at 8 bytes each (blank -> 0)."""
+    col = col.astype("string")
+    return col.where(col.str.fullmatch(r"\d+", na=False), "0").to_numpy(dtype=str).astype(np.uint64)
+
+
+# ─── GRAPH ───────────────────────────────────────────────────────────────────
+class UserGraph:
+    """Bipartite user <-> league graph in CSR form, both directions.
+
+    users / leagues are sorted uint64 ids; league_users[league_indptr[i]:league_indptr[i+1]]
+    are the user rows of league i and user_leagues the reverse. league_expanded marks
+    leagues whose rosters were fetched, user_seasons is a per-user bitmask of the
+    seasons whose league lists were fetched, so both lookups can be replayed.
+    """
+
+    ARRAYS = ["users", "leagues", "league_season", "league_prev", "league_expanded", "user_seasons",
+              "league_indptr", "league_users", "user_indptr", "user_leagues"]
+
+    def __init__(self, **arrays):
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def empty(cls):
+        z = np.zeros(0, dtype=np.uint64)
+        return cls(users=z, leagues=z, league_season=np.zeros(0, np.int16), league_prev=z,
+                   league_expanded=np.zeros(0, bool), user_seasons=z,
+                   league_indptr=np.zeros(1, np.int64), league_users=np.zeros(0, np.int32),
+                   user_indptr=np.zeros(1, np.int64), user_leagues=np.zeros(0, np.int32))
+
+    @classmethod
+    def from_edges(cls, edges):
+        """Compile an edge log frame (EDGE_COLS); blank user/league ids mark empty lookups."""
+        user = _ids(edges["user_id"])
+        league = _ids(edges["league_id"])
+        season = pd.to_numeric(edges["season"], errors="coerce").fillna(0).astype(np.int16).to_numpy()
+        prev = _ids(edges["previous_league_id"])
+        source = edges["source"].to_numpy()
+
+        users = np.unique(user[user > 0])
+        leagues = np.unique(league[league > 0])
+        u = np.searchsorted(users, user)
+        lg = np.searchsorted(leagues, league)
+        has_u, has_l = user > 0, league > 0
+
+        league_season = np.zeros(len(leagues), np.int16)
+        league_prev = np.zeros(len(leagues), np.uint64)
+        known = has_l & (season > 0)
+        league_season[lg[known]] = season[known]
+        linked = has_l & (prev > 0)
+        league_prev[lg[linked]] = prev[linked]
+
+        league_expanded = np.zeros(len(leagues), bool)
+        league_expanded[lg[has_l & (source == "rosters")]] = True
+        user_seasons = np.zeros(len(users), np.uint64)
+        fetched = has_u & (source == "user_leagues") & (season >= FIRST_SEASON) & (season <= LAST_SEASON)
+        np.bitwise_or.at(user_seasons, u[fetched],
+                         np.left_shift(np.uint64(1), (season[fetched] - FIRST_SEASON).astype(np.uint64)))
+
+        pairs = np.unique(np.stack([lg[has_u & has_l], u[has_u & has_l]]), axis=1)
+        ones = np.ones(pairs.shape[1], dtype=np.int8)
+        B = sparse.csr_matrix((ones, (pairs[0], pairs[1])), shape=(len(leagues), len(users)))
+        Bt = B.T.tocsr()
+        return cls(users=users, leagues=leagues, league_season=league_season, league_prev=league_prev,
+                   league_expanded=league_expanded, user_seasons=user_seasons,
+                   league_indptr=B.indptr.astype(np.int64), league_users=B.indices.astype(np.int32),
+                   user_indptr=Bt.indptr.astype(np.int64), user_leagues=Bt.indices.astype(np.int32))
+
+    @classmethod
+    def from_log(cls, path=EDGE_LOG_CSV):
+        if not os.path.exists(path):
+            return cls.empty()
+        return cls.from_edges(pd.read_csv(path, dtype=str))
+
+    def save(self, path=USER_GRAPH_NPZ):
+        np.savez_compressed(path, **{name: getattr(self, name) for name in self.ARRAYS})
+        return path
+
+    @classmethod
+    def load(cls, path=USER_GRAPH_NPZ):
+        with np.load(path) as z:
+            return cls(**{name: z[name] for name in cls.ARRAYS})
+
+    @property
+    def n_edges(self):
+        return len(self.league_users)
+
+    def biadjacency(self):
+        """leagues x users membership matrix."""
+        data = np.ones(self.n_edges, dtype=np.int8)
+        return sparse.csr_matrix((data, self.league_users, self.league_indptr),
+                                 shape=(len(self.leagues), len(self.users)))
+
+    # ─── REPLAY ─────────────────────────────────────────────────────────────
+    def _row(self, ids, key):
+        i = np.searchsorted(ids, np.uint64(int(key)))
+        return i if i < len(ids) and ids[i] == np.uint64(int(key)) else None
+
+    def owners(self, league_id):
+        """Owner ids from a previous rosters fetch, None if it was never fetched."""
+        i = self._row(self.leagues, league_id)
+        if i is None or not self.league_expanded[i]:
+            return None
+        rows = self.league_users[self.league_indptr[i]:self.league_indptr[i + 1]]
+        return [str(u) for u in self.users[rows]]
+
+    def user_leagues_for(self, user_id, season):
+        """League dicts (league_id, season, previous_league_id) from a previous fetch, else None."""
+        # seasons outside the mask's range are never recorded, so never replayed
+        if not FIRST_SEASON <= season <= LAST_SEASON:
+            return None
+        i = self._row(self.users, user_id)
+        bit = np.uint64(1) << np.uint64(season - FIRST_SEASON)
+        if i is None or not (self.user_seasons[i] & bit):
+            return None
+        rows = self.user_leagues[self.user_indptr[i]:self.user_indptr[i + 1]]
+        rows = rows[self.league_season[rows] == season]
+        return [{"league_id": str(self.leagues[r]), "season": season,
+                 "previous_league_id": str(self.league_prev[r]) if self.league_prev[r] else None}
+                for r in rows]
+
+    # ─── STATS ──────────────────────────────────────────────────────────────
+    def components(self):
+        """Connected component label per league and per user."""
+        B = self.biadjacency()
+        n_l = len(self.leagues)
+        A = sparse.bmat([[None, B], [B.T, None]], format="csr")
+        _, labels = connected_components(A, directed=False)
+        return labels[:n_l], labels[n_l:]
+
+    def coverage(self, seen=(), out_of_filter=()):
+        """Node / edge counts, how much of the graph was expanded, and component sizes."""
+        league_comp, _ = self.components()
+        sizes = np.bincount(league_comp)
+        sizes = np.sort(sizes[sizes > 0])[::-1]
+        targets = self.targets(seen, out_of_filter)
+        by_season = pd.Series(self.league_season).replace(0, np.nan).value_counts().sort_index()
+        return {
+            "users":                 len(self.users),
+            "leagues":               len(self.leagues),
+            "edges":                 self.n_edges,
+            "leagues_expanded":      int(self.league_expanded.sum()),
+            "users_expanded":        int((self.user_seasons > 0).sum()),
+            "leagues_seen":          int(self._mask(seen).sum()),
+            "unseen_in_filter":      int(targets.sum()),
+            "components":            int(len(sizes)),
+            "largest_component":     int(sizes[0]) if len(sizes) else 0,
+            "largest_share":         round(float(sizes[0] / sizes.sum()), 4) if len(sizes) else 0.0,
+            "singleton_leagues":     int((sizes == 1).sum()),
+            "leagues_by_season":     {int(k): int(v) for k, v in by_season.items()},
+        }
+
+    def _mask(self, ids):
+        ids = np.asarray(sorted({int(i) for i in ids if str(i).isdigit()}), dtype=np.uint64)
+        return np.isin(self.leagues, ids)
+
+    def targets(self, seen=(), out_of_filter=(), seasons=SEASONS):
+        """Leagues worth crawling: not scraped yet, not out of filter, season requested (or unknown)."""
+        season_ok = (self.league_season == 0) | np.isin(self.league_season, seasons)
+        return ~self._mask(seen) & ~self._mask(out_of_filter) & season_ok
+
+    # ─── SEEDS ──────────────────────────────────────────────────────────────
+    def reach(self, rows, k=K_HOPS):
+        """rows x leagues boolean matrix of leagues within k league->user->league hops."""
+        B = self.biadjacency().astype(np.int32)
+        R = sparse.csr_matrix((np.ones(len(rows), np.int32), (np.arange(len(rows)), rows)),
+                              shape=(len(rows), len(self.leagues)))
+        for _ in range(k):
+            R = R + (R @ B) @ B.T
+            R.data[:] = 1
+        return R
+
+    def select_seeds(self, target, n_seeds=N_SEEDS, k=K_HOPS, candidates=CANDIDATES):
+        """Greedy max coverage: each seed adds the most target leagues not already reachable."""
+        degree = np.diff(self.league_indptr)
+        cand = np.argsort(-degree, kind="stable")[:candidates]
+        # a chunk of candidates at a time, each cut down to the target leagues right away
+        target_cols = np.flatnonzero(target)
+        rows = sparse.vstack([self.reach(cand[lo:lo + REACH_CHUNK], k)[:, target_cols]
+                              for lo in range(0, len(cand), REACH_CHUNK)]
+                             or [sparse.csr_matrix((0, len(target_cols)), dtype=np.int32)], format="csr")
+        cols = rows.tocsc()
+        gains = np.asarray(rows.sum(axis=1)).ravel().astype(np.int64)
+        covered = np.zeros(rows.shape[1], bool)
+        picks = []
+        for _ in range(min(n_seeds, len(cand))):
+            best = int(np.argmax(gains))
+            if gains[best] <= 0:
+                break
+            picks.append((str(self.leagues[cand[best]]), int(gains[best])))
+            new = rows.indices[rows.indptr[best]:rows.indptr[best + 1]]
+            new = new[~covered[new]]
+            covered[new] = True
+            # every candidate loses the leagues it shared with this pick
+            gains -= np.asarray(cols[:, new].sum(axis=1)).ravel().astype(np.int64)
+            gains[best] = -1
+        return pd.DataFrame(picks, columns=["league_id", "new_leagues_reached"])
+
+
+# ─── CRAWL LOG ───────────────────────────────────────────────────────────────
+class EdgeLog:
+    """What the crawl sees, appended to EDGE_LOG_CSV, with replay of earlier runs.
+
+    owners() / user_leagues() answer from the compiled graph when the same lookup
+    was made before, so a re-crawl only hits the API for new nodes.
+    """
+
+    def __init__(self, path=EDGE_LOG_CSV, graph=None):
+        self.path = path
+        self.graph = graph if graph is not None else UserGraph.from_log(path)
+        self.replayed = 0
+
+    def _append(self, rows):
+        new = not os.path.exists(self.path)
+        with open(self.path, "a", newline="") as f:
+            w = csv.writer(f)
+            if new:
+                w.writerow(EDGE_COLS)
+            w.writerows(rows)
+
+    def owners(self, league, fetch):
+        """Owner ids of a league dict; fetch() -> list of owner ids (or None on error) when not replayable."""
+        league_id = str(league["league_id"])
+        cached = self.graph.owners(league_id)
+        if cached is not None:
+            self.replayed += 1
+            return cached, True
+        owners = fetch()
+        if owners is not None:
+            season, prev = league.get("season") or "", league.get("previous_league_id") or ""
+            self._append([(u, league_id, season, prev, "rosters") for u in owners]
+                         or [("", league_id, season, prev, "rosters")])
+        return owners or [], False
+
+    def user_leagues(self, user_id, fetch, seasons=SEASONS):
+        """League dicts for a user across seasons; fetch(missing_seasons) only for seasons not replayable.
+
+        fetch returns (leagues, failed_seasons) like seasons.user_leagues; failed
+        seasons are not logged, so the next run asks again instead of replaying
+        "no leagues".
+        """
+        leagues, missing = [], []
+        for s in seasons:
+            cached = self.graph.user_leagues_for(user_id, s)
+            if cached is None:
+                missing.append(s)
+            else:
+                leagues += cached
+        if not missing:
+            self.replayed += 1
+            return leagues, True
+        fetched, failed = fetch(missing)
+        rows = [(user_id, lg["league_id"], lg.get("season") or "", lg.get("previous_league_id") or "",
+                 "user_leagues") for lg in fetched]
+        got = {int(lg["season"]) for lg in fetched if lg.get("season")}
+        # a blank row marks a season that answered with no leagues
+        rows += [(user_id, "", s, "", "user_leagues") for s in missing if s not in got and s not in failed]
+        if rows:
+            self._append(rows)
+        return leagues + fetched, False
+
+
+# ─── MAIN ────────────────────────────────────────────────────────────────────
+def scraped_league_ids():
+    """league_ids whose info was already scraped (s2 per-league files or master_info)."""
+    ids = set()
+    for path in [os.path.join(RAW_DATA_DIR, "master_info.csv"),
+                 os.path.join(RAW_DATA_DIR, "info", "already_done.csv"),
+                 os.path.join(RAW_DATA_DIR, "already_done.csv")]:
+        if os.path.exists(path):
+            ids |= set(pd.read_csv(path, usecols=["league_id"], dtype=str)["league_id"].dropna())
+    ids |= {os.path.splitext(os.path.basename(p))[0]
+            for p in glob.glob(os.path.join(RAW_DATA_DIR, "info", "*.csv"))}
+    return {i for i in ids if i.isdigit()}
+
+
+def main():
+    with section("compile"):
+        graph = UserGraph.from_log()
+        graph.save()
+    if not len(graph.leagues):
+        print(f"No edges logged yet in {EDGE_LOG_CSV}; run the crawl first")
+        return
+
+    seen = scraped_league_ids()
+    out = (set(pd.read_csv(OUT_OF_FILTER_CSV, dtype=str)["league_id"].dropna())
+           if os.path.exists(OUT_OF_FILTER_CSV) else set())
+    with section("coverage"):
+        for k, v in graph.coverage(seen, out).items():
+            print(f"{k:<20}{v}")
+
+    with section("seeds"):
+        seeds = graph.select_seeds(graph.targets(seen, out))
+    seeds.to_csv(SEED_CSV, index=False)
+    print(f"{len(seeds)} seeds reaching {seeds['new_leagues_reached'].sum()} unseen in-filter leagues "
+          f"within {K_HOPS} hops → {SEED_CSV}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import os
+import re
+import sys
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# this file lives in <repo>/4. cleaning_processing/matchups/
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MASTER_MATCHUPS_CSV = os.path.join(BASE_DIR, '3. raw_data', 'master_matchups.csv')
+sys.path.insert(0, BASE_DIR)
+from profiling import section, add_rows
+
+# rows per read_csv chunk; peak memory scales with this, not with the file
+CHUNK_ROWS = 50_000
+
+MATCHUP_DTYPES = {
+    'league_id': str,
+    'week': 'int16',
+    'roster_id': 'int32',
+    'matchup_id': 'Int32',     # <NA> for bye / consolation weeks
+    'points': 'float64',
+    'season': 'Int16',         # only in multi-season crawls
+}
+STR_LIST_COLS = ('starters', 'players')
+FLOAT_LIST_COLS = ('starters_points',)
+DICT_COLS = ('players_points',)
+
+_QUOTED = re.compile(r"'([^']*)'")
+_DICT_KEY = re.compile(r"'([^']*)':")
+_DICT_VAL = re.compile(r":\s*([^,}\s]+)")
+
+
+# ─── LIST PARSING ─────────────────────────────────────────────────────────────
+# the csv holds python reprs like "['4046', '4984']"; instead of literal_eval per
+# row, each column is flattened to (values, lengths) with one regex pass per batch
+def flat_str_lists(col):
+    s = col.fillna('[]').astype(str)
+    lengths = (s.str.count("'") // 2).to_numpy()
+    return np.array(_QUOTED.findall(''.join(s)), dtype=object), lengths
+
+def flat_float_lists(col):
+    s = col.fillna('[]').astype(str).str.strip('[]')
+    lengths = np.where(s.str.len() > 0, s.str.count(',') + 1, 0)
+    values = ' '.join(s).replace(',', ' ').split()
+    return np.array(values, dtype=float), lengths
+
+def flat_dicts(col):
+    s = col.fillna('{}').astype(str)
+    joined = ''.join(s)
+    keys = np.array(_DICT_KEY.findall(joined), dtype=object)
+    values = np.array([v if v != 'None' else 'nan' for v in _DICT_VAL.findall(joined)], dtype=float)
+    return keys, values, s.str.count("':").to_numpy()
+
+
+# ─── BATCHES ──────────────────────────────────────────────────────────────────
+def read_batches(path=MASTER_MATCHUPS_CSV, chunksize=CHUNK_ROWS, list_cols=('starters', 'starters_points')):
+    """Yield (frame, lists) batches of master_matchups.
+
+    frame holds the typed scalar columns; lists maps each requested list column
+    to flat arrays: (values, lengths) or, for dict columns, (keys, values, lengths).
+    A league never straddles two batches, so matchups and weeks are always whole.
+    That needs the file's rows grouped by league_id (merge_raw_data keeps them
+    so); a league that shows up again after another one raises ValueError.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in MATCHUP_DTYPES if c in header] + [c for c in list_cols if c in header]
+    dtypes = {c: t for c, t in MATCHUP_DTYPES.items() if c in header}
+
+    carry, seen = None, set()
+    reader = iter(pd.read_csv(path, chunksize=chunksize, usecols=usecols, dtype=dtypes))
+    while True:
+        with section("read_csv"):
+            chunk = next(reader, None)
+        if chunk is None:
+            break
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        # hold back the last league; it may continue in the next chunk
+        last = chunk['league_id'].iat[-1]
+        tail = (chunk['league_id'] == last).to_numpy()
+        if tail.all():
+            carry = chunk
+            continue
+        carry = chunk[tail]
+        yield _split(_grouped(chunk[~tail].reset_index(drop=True), seen, path), list_cols)
+    if carry is not None and len(carry):
+        yield _split(_grouped(carry.reset_index(drop=True), seen, path), list_cols)
+
+def _grouped(chunk, seen, path):
+    """chunk, after checking each of its leagues is one contiguous run not seen in an earlier batch."""
+    lid = chunk['league_id']
+    starts = lid[(lid != lid.shift()).to_numpy()]
+    split = starts[starts.duplicated() | starts.isin(seen)]
+    if len(split):
+        raise ValueError(f"{os.path.basename(path)} is not grouped by league_id (league {split.iat[0]} "
+                         f"appears in more than one run); re-run merge_raw_data.py to regroup it")
+    seen.update(starts)
+    return chunk
+
+def _split(chunk, list_cols):
+    add_rows(len(chunk))
+    with section("parse_lists"):
+        return _parse(chunk, list_cols)
+
+def _parse(chunk, list_cols):
+    lists = {}
+    for col in list_cols:
+        if col not in chunk:
+            continue
+        if col in DICT_COLS:
+            lists[col] = flat_dicts(chunk[col])
+        elif col in FLOAT_LIST_COLS:
+            lists[col] = flat_float_lists(chunk[col])
+        else:
+            lists[col] = flat_str_lists(chunk[col])
+    frame = chunk.drop(columns=[c for c in list_cols if c in chunk])
+    return frame, lists
+
+
+def starter_points(lists):
+    """starters_points aligned with the flat starters ids.
+
+    Rows whose two lists differ in length get NaN for every starter, instead of
+    shifting the rest of the batch onto the wrong players.
+    """
+    ids, id_lengths = lists['starters']
+    pts, pt_lengths = lists['starters_points']
+    same = id_lengths == pt_lengths
+    out = np.full(len(ids), np.nan)
+    out[np.repeat(same, id_lengths)] = pts[np.repeat(same, pt_lengths)]
+    return out
+
+
+def label_batch_wins(frame):
+    """1 for the higher-scoring roster of each league/week/matchup, 0 otherwise, NaN without a matchup."""
+    keys = [frame['league_id'], frame['week'], frame['matchup_id']]
+    best = frame.groupby(keys)['points'].transform('max')
+    return np.where(frame['matchup_id'].isna(), np.nan, (frame['points'] == best).astype(float))
+
+
+# ─── INCREMENTAL BUILDERS ─────────────────────────────────────────────────────
+class PlayerVocab:
+    """Growing player_id -> column index shared by the builders."""
+
+    def __init__(self):
+        self.index = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def codes(self, ids):
+        inv, uniq = pd.factorize(ids)
+        mapped = np.array([self.index.setdefault(u, len(self.index)) for u in uniq], dtype=np.int32)
+        return mapped[inv] if len(inv) else np.empty(0, dtype=np.int32)
+
+    def classes(self):
+        return np.array(list(self.index), dtype=object)
+
+
+class DesignMatrixBuilder:
+    """Starter-incidence design matrix, win target, weeks and seasons, one batch at a time.
+
+    Only the CSR components (int32 column indices + row pointers) are kept,
+    never the parsed python lists.
+    """
+
+    def __init__(self, vocab=None):
+        self.vocab = vocab or PlayerVocab()
+        self.indices, self.lengths, self.win, self.week, self.season = [], [], [], [], []
+
+    def add(self, frame, lists):
+        ids, lengths = lists['starters']
+        self.indices.append(self.vocab.codes(ids))
+        self.lengths.append(lengths.astype(np.int32))
+        self.win.append(label_batch_wins(frame))
+        self.week.append(frame['week'].to_numpy())
+        # -1 where the crawl didn't tag a season (single-season crawls)
+        season = frame['season'] if 'season' in frame else pd.Series(pd.NA, index=frame.index, dtype='Int16')
+        self.season.append(season.fillna(-1).to_numpy(dtype=np.int16))
+        return self
+
+    def result(self):
+        """(X csr [rows x players], y win, week, season, player classes)."""
+        lengths = np.concatenate(self.lengths)
+        indices = np.concatenate(self.indices)
+        indptr = np.r_[0, np.cumsum(lengths)].astype(np.int64)
+        X = sparse.csr_matrix((np.ones(len(indices), dtype=np.float64), indices, indptr),
+                              shape=(len(lengths), len(self.vocab)))
+        # a player listed twice in one lineup still counts once, as with MultiLabelBinarizer
+        X.sum_duplicates()
+        X.data[:] = 1
+        return (X, np.concatenate(self.win), np.concatenate(self.week), np.concatenate(self.season),
+                self.vocab.classes())
+
+
+class StarterAggregates:
+    """Per-player starts and points, kept as bincount-able arrays over the vocab."""
+
+    def __init__(self, vocab=None):
+        self.vocab = vocab or PlayerVocab()
+        self.starts = np.zeros(0)
+        self.points = np.zeros(0)
+
+    def add(self, frame, lists):
+        ids, id_lengths = lists['starters']
+        codes = self.vocab.codes(ids)
+        # starts and points only from rows whose starters and starters_points line up
+        paired = np.repeat(lists['starters_points'][1] == id_lengths, id_lengths)
+        codes, pts = codes[paired], starter_points(lists)[paired]
+        n = len(self.vocab)
+        self.starts = np.pad(self.starts, (0, n - len(self.starts))) + np.bincount(codes, minlength=n)
+        self.points = np.pad(self.points, (0, n - len(self.points))) + np.bincount(
+            codes, weights=np.nan_to_num(pts), minlength=n)
+        return self
+
+    def result(self):
+        n = len(self.vocab)
+        starts = np.pad(self.starts, (0, n - len(self.starts)))
+        points = np.pad(self.points, (0, n - len(self.points)))
+        return pd.DataFrame({
+            'player_id': self.vocab.classes(),
+            'sample_size': starts.astype(int),
+            'total_points': points,
+            'mean_points': np.divide(points, starts, out=np.full(n, np.nan), where=starts > 0),
+        })
+
+
+def write_starter_facts(batches, out_path):
+    """Stream the one-row-per-starter fact table to csv, batch by batch."""
+    rows = 0
+    for i, (frame, lists) in enumerate(batches):
+        ids, lengths = lists['starters']
+        long = frame.loc[np.repeat(np.arange(len(frame)), lengths),
+                         ['league_id', 'week', 'roster_id', 'matchup_id', 'points']]
+        long['starter_id'] = ids
+        long['starter_points'] = starter_points(lists)
+        long.to_csv(out_path, index=False, mode='w' if i == 0 else 'a', header=i == 0)
+        rows += len(long)
+    return rows
@@ -2,98 +2,122 @@ import os
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import RidgeCV
-from sklearn.preprocessing import MultiLabelBinarizer
-import ast
-from collections import Counter
-
-def safe_literal_eval(val):
-    try:
-        return ast.literal_eval(val)
-    except (ValueError, SyntaxError, TypeError):
-        return []
-
-raw_matchups = pd.read_csv('3. raw_data/master_matchups.csv')
-raw_players = pd.read_csv('3. raw_data/players_sleeper.csv')
-# Keep only relevant player info
-players = raw_players[['player_id', 'position', 'full_name']].copy()
-
-raw_matchups['starters'] = raw_matchups['starters'].fillna('[]').apply(safe_literal_eval)
-raw_matchups['starters_points'] = raw_matchups['starters_points'].fillna('[]').apply(safe_literal_eval)
-
-# --- Compute binary win/loss target ---
-# For each matchup, assign 1 to the roster with the higher points, 0 otherwise
-raw_matchups['win'] = (
-    raw_matchups
-    .groupby('matchup_id')['points']
-    .transform(lambda pts: (pts == pts.max()).astype(int))
-)
-
-# --- Ridge Regression with Time Decay on Game-Level Data ---
-# Build X and binary y (win/loss) for game-level Ridge
-mlb = MultiLabelBinarizer(sparse_output=True)
-X = mlb.fit_transform(raw_matchups['starters'])
-y = raw_matchups['win'].values
-
-# Compute time-decay sample weights based on week numbers
+import matchup_stream
+from matchup_stream import (read_batches, label_batch_wins, DesignMatrixBuilder, StarterAggregates,
+                            write_starter_facts, CHUNK_ROWS)
+from profiling import section
+from artifact_cache import cached
+
+# this file lives in <repo>/4. cleaning_processing/matchups/
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MASTER_MATCHUPS_CSV = os.path.join(BASE_DIR, '3. raw_data', 'master_matchups.csv')
+PLAYERS_CSV = os.path.join(BASE_DIR, '3. raw_data', 'players_sleeper.csv')
+STARTER_FACTS_CSV = os.path.join(BASE_DIR, '3. raw_data', 'starter_facts.csv')
+
 # half-life of 4 weeks
 half_life_weeks = 4
-lam = np.log(2) / half_life_weeks
-max_week = raw_matchups['week'].max()
-age_weeks = (max_week - raw_matchups['week']).clip(lower=0)
-w = np.exp(-lam * age_weeks)
-
-ridge = RidgeCV(alphas=np.logspace(-2, 3, 20), fit_intercept=False, cv=5)
-# --- Filter out any rows with missing targets ---
-mask = ~np.isnan(y)
-X = X[mask]
-y = y[mask]
-w = w[mask]
-ridge.fit(X, y, sample_weight=w)
-
-effects = pd.Series(ridge.coef_, index=mlb.classes_).sort_values(ascending=False)
-# --- Join player info to effects ---
-effects_df = effects.rename_axis('player_id').reset_index(name='effect')
-# Ensure player_id type matches
-effects_df['player_id'] = effects_df['player_id'].astype(players['player_id'].dtype)
-# Merge to get names and positions
-effects_with_info = effects_df.merge(players, on='player_id', how='left')
-# --- Compute sample size per player ---
-counts = Counter()
-for starters in raw_matchups['starters']:
-    counts.update(starters)
-# Turn into DataFrame for merging
-sample_size_df = (
-    pd.Series(counts, name='sample_size')
-      .rename_axis('player_id')
-      .reset_index()
-)
-# Ensure same dtype
-sample_size_df['player_id'] = sample_size_df['player_id'].astype(players['player_id'].dtype)
-# Merge sample size into effects_with_info
-effects_with_info = effects_with_info.merge(sample_size_df, on='player_id', how='left')
-
-# Filter to core offensive positions and display top 10
-effects_with_info = effects_with_info[effects_with_info['position'].isin(["QB","WR","RB","TE"])]
-print("Top 10 player effects on win probability:")
-print(effects_with_info.head(10)[['player_id', 'full_name', 'position', 'effect', 'sample_size']])
-
-print("Bottom 10 player effects on win probability:")
-print(effects_with_info.tail(10).sort_values(by='effect', ascending=True)[['player_id', 'full_name', 'position', 'effect', 'sample_size']])
-
-# Display top 10 players by sample size
-top_10_sample_size = effects_with_info.sort_values(by='sample_size', ascending=False).head(10)
-print("Top 10 players by sample size:")
-print(top_10_sample_size[['player_id', 'full_name', 'position', 'effect', 'sample_size']])
+# weeks one season is worth when ageing games across seasons (regular season + playoffs)
+weeks_per_season = 18
+
+def build_inputs(path=MASTER_MATCHUPS_CSV, chunksize=CHUNK_ROWS):
+    # matchups are streamed a few leagues at a time; only the sparse design
+    # matrix and per-player aggregates are held, never the parsed lists
+    design = DesignMatrixBuilder()
+    aggregates = StarterAggregates(design.vocab)
+    for frame, lists in read_batches(path, chunksize):
+        with section("design_matrix"):
+            design.add(frame, lists)
+            aggregates.add(frame, lists)
+    X, y, week, season, classes = design.result()
+    return {'X': X, 'y': y, 'week': week, 'season': season, 'classes': classes,
+            'aggregates': aggregates.result()}
+
+def load_inputs(chunksize=CHUNK_ROWS):
+    # X, y, weeks and aggregates only change with master_matchups or the parsing
+    # code (matchup_stream and this file), so later runs map them from the
+    # artifact cache instead of re-parsing
+    with section("artifact_cache"):
+        art = cached('rapm_inputs', lambda: build_inputs(MASTER_MATCHUPS_CSV, chunksize),
+                     inputs=[MASTER_MATCHUPS_CSV, matchup_stream.__file__, __file__])
+
+    raw_players = pd.read_csv(PLAYERS_CSV)
+    # Keep only relevant player info
+    players = raw_players[['player_id', 'position', 'full_name']].copy()
+    return (art['X'], art['y'], art['week'], art['season'], art['classes']), art['aggregates'], players
+
+def label_wins(raw_matchups):
+    # --- Compute binary win/loss target ---
+    # For each league/week/matchup, assign 1 to the roster with the higher points, 0 otherwise
+    # (matchup_id alone repeats across leagues and weeks)
+    return pd.Series(label_batch_wins(raw_matchups), index=raw_matchups.index)
+
+def game_age(week, season):
+    # weeks between each game and the latest one, counted across seasons so week 15 of 2022
+    # is older than week 3 of 2023. Untagged seasons (-1) count as the latest season.
+    season = np.where(season < 0, season.max(initial=0), season).astype(np.int64)
+    t = season * weeks_per_season + week
+    return np.clip(t.max(initial=0) - t, 0, None)
+
+def fit_rapm(X, y, week, season, classes):
+    # --- Ridge Regression with Time Decay on Game-Level Data ---
+    # X is the starter-incidence matrix, y the binary win/loss target
+
+    # Compute time-decay sample weights from each game's (season, week)
+    lam = np.log(2) / half_life_weeks
+    age_weeks = game_age(week, season)
+    w = np.exp(-lam * age_weeks)
+
+    ridge = RidgeCV(alphas=np.logspace(-2, 3, 20), fit_intercept=False, cv=5)
+    # --- Filter out any rows with missing targets ---
+    mask = ~np.isnan(y)
+    X = X[mask]
+    y = y[mask]
+    w = w[mask]
+    with section("ridge_fit"):
+        ridge.fit(X, y, sample_weight=w)
+
+    return pd.Series(ridge.coef_, index=classes).sort_values(ascending=False)
+
+def report(effects, aggregates, players):
+    # --- Join player info to effects ---
+    effects_df = effects.rename_axis('player_id').reset_index(name='effect')
+    # Ensure player_id type matches
+    effects_df['player_id'] = effects_df['player_id'].astype(players['player_id'].dtype)
+    # Merge to get names and positions
+    effects_with_info = effects_df.merge(players, on='player_id', how='left')
+    # --- Sample size per player, counted while streaming ---
+    sample_size_df = aggregates[['player_id', 'sample_size']].copy()
+    # Ensure same dtype
+    sample_size_df['player_id'] = sample_size_df['player_id'].astype(players['player_id'].dtype)
+    # Merge sample size into effects_with_info
+    effects_with_info = effects_with_info.merge(sample_size_df, on='player_id', how='left')
+
+    # Filter to core offensive positions and display top 10
+    effects_with_info = effects_with_info[effects_with_info['position'].isin(["QB","WR","RB","TE"])]
+    print("Top 10 player effects on win probability:")
+    print(effects_with_info.head(10)[['player_id', 'full_name', 'position', 'effect', 'sample_size']])
+
+    print("Bottom 10 player effects on win probability:")
+    print(effects_with_info.tail(10).sort_values(by='effect', ascending=True)[['player_id', 'full_name', 'position', 'effect', 'sample_size']])
+
+    # Display top 10 players by sample size
+    top_10_sample_size = effects_with_info.sort_values(by='sample_size', ascending=False).head(10)
+    print("Top 10 players by sample size:")
+    print(top_10_sample_size[['player_id', 'full_name', 'position', 'effect', 'sample_size']])
+    return effects_with_info
 # ----------------------------------------------------------
 
-# 2. Explode into one row per starter
-raw_matchups_long = (
-    raw_matchups
-    .explode(['starters', 'starters_points'])
-    .rename(columns={
-        'starters': 'starter_id',
-        'starters_points': 'starter_points'
-    })[
-        ['league_id', 'week', 'roster_id', 'matchup_id', 'points', 'starter_id', 'starter_points']
-    ]
-)
\ No newline at end of file
+def explode_starters(out_path=None, chunksize=CHUNK_ROWS):
+    # 2. One row per starter, streamed to csv batch by batch
+    return write_starter_facts(read_batches(MASTER_MATCHUPS_CSV, chunksize), out_path or STARTER_FACTS_CSV)
+
+def main():
+    with section("load"):
+        (X, y, week, season, classes), aggregates, players = load_inputs()
+    effects = fit_rapm(X, y, week, season, classes)
+    report(effects, aggregates, players)
+    with section("starter_facts"):
+        explode_starters()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import glob
+import pandas as pd
+
+# ─── PATHS ───────────────────────────────────────────────────────────────────
+# this file lives in <repo>/4. cleaning_processing/
+BASE_DIR     = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DATA_DIR = os.path.join(BASE_DIR, "3. raw_data")
+sys.path.insert(0, BASE_DIR)
+from profiling import profiled, section, add_rows
+
+INFO_DIR     = os.path.join(RAW_DATA_DIR, "info")
+DRAFTS_DIR   = os.path.join(RAW_DATA_DIR, "drafts")
+MATCHUPS_DIR = os.path.join(RAW_DATA_DIR, "matchups")
+
+MASTER_INFO_CSV     = os.path.join(RAW_DATA_DIR, "master_info.csv")
+MASTER_DRAFTS_CSV   = os.path.join(RAW_DATA_DIR, "master_drafts.csv")
+MASTER_MATCHUPS_CSV = os.path.join(RAW_DATA_DIR, "master_matchups.csv")
+
+master_drafts_cols = ["league_id","draft_id","draft_slot","pick_no","is_keeper","player_id","position","picked_by","draft_time","season"]
+
+
+# ─── HELPERS ──────────────────────────────────────────────────────────────────
+@profiled()
+def read_league_files(folder, prefix=""):
+    """Concat the per-league csvs written by s2/s3, league_id taken from the file name."""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(folder, f"{prefix}*.csv"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name == "already_done":
+            continue
+        df = pd.read_csv(path, dtype=str)
+        # s2's draft files are a merge on draft_id, so league_id comes back as _x/_y
+        df = df.drop(columns=[c for c in df.columns if c.startswith("league_id")])
+        df.insert(0, "league_id", name[len(prefix):])
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+def merge_into_master(path, new, keys, cols=None):
+    """Append new rows to a master csv, keeping the first copy of each key.
+
+    Rows stay grouped by the first key (league_id), which streamed readers rely on.
+    """
+    if new is None:
+        print(f"No per-league files for {os.path.basename(path)}")
+        return
+    if cols is not None:
+        new = new.reindex(columns=cols)
+    master = pd.read_csv(path, dtype=str) if os.path.exists(path) else pd.DataFrame(columns=new.columns)
+    with section("concat"):
+        combined = pd.concat([master, new], ignore_index=True)
+        combined = combined.drop_duplicates(subset=keys, keep="first")
+        combined = combined.sort_values(keys[0], kind="stable")
+    with section("to_csv"):
+        combined.to_csv(path, index=False)
+    add_rows(len(new))
+    print(f"{os.path.basename(path)}: {len(master)} → {len(combined)} rows")
+
+
+def main():
+    merge_into_master(MASTER_INFO_CSV, read_league_files(INFO_DIR), ["league_id"])
+    merge_into_master(MASTER_DRAFTS_CSV, read_league_files(DRAFTS_DIR),
+                      ["league_id", "pick_no"], cols=master_drafts_cols)
+    merge_into_master(MASTER_MATCHUPS_CSV, read_league_files(MATCHUPS_DIR, prefix="matchups_"),
+                      ["league_id", "week", "roster_id"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from common import RAW_DATA_DIR, format_key, load_drafts, load_info, save_output
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+ADP_SKETCH_NPZ = os.path.join(RAW_DATA_DIR, "adp_sketches.npz")
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+# ─── SKETCH STORE ───────────────────────────────────────────────────────────
+class AdpStore:
+    """Per-(player_id, format) pick histograms.
+
+    pick_no is a small bounded integer, so a histogram indexed by pick is an
+    exact quantile sketch: count, mean and any percentile fall out of it,
+    two stores merge by adding counts, and updates are O(picks). The leagues
+    already folded in are kept alongside, so re-feeding a league is a no-op.
+    """
+
+    def __init__(self):
+        self.hists = {}
+        self.leagues = set()
+
+    def __len__(self):
+        return len(self.hists)
+
+    def add(self, key, pick_nos):
+        counts = np.bincount(np.asarray(pick_nos, dtype=np.int64))
+        self._add_counts(key, counts)
+
+    def _add_counts(self, key, counts):
+        cur = self.hists.get(key)
+        if cur is None:
+            self.hists[key] = counts.astype(np.int64)
+            return
+        if len(counts) > len(cur):
+            counts, cur = cur, counts.astype(np.int64)
+        cur[:len(counts)] += counts
+        self.hists[key] = cur
+
+    def update(self, picks, formats):
+        """Fold in picks (league_id, pick_no, player_id) of leagues not yet in the store.
+
+        formats maps league_id -> format key; leagues without one are skipped
+        and left for a later update.
+        """
+        picks = picks[~picks["league_id"].astype(str).isin(self.leagues)]
+        picks = picks.assign(format=picks["league_id"].map(formats))
+        picks = picks.dropna(subset=["format", "player_id", "pick_no"])
+        for key, grp in picks.groupby(["player_id", "format"])["pick_no"]:
+            self.add(key, grp.to_numpy())
+        self.leagues.update(picks["league_id"].astype(str).unique())
+        return self
+
+    def merge(self, other):
+        """Add another shard's counts into this store; shards hold disjoint leagues."""
+        for key, counts in other.hists.items():
+            self._add_counts(key, counts)
+        self.leagues |= other.leagues
+        return self
+
+    # ─── QUERIES ────────────────────────────────────────────────────────────
+    def stats(self, player_id, fmt, quantiles=QUANTILES):
+        counts = self.hists.get((player_id, fmt))
+        if counts is None:
+            return None
+        n = counts.sum()
+        picks = np.arange(len(counts))
+        cdf = np.cumsum(counts)
+        out = {"player_id": player_id, "format": fmt, "n": int(n),
+               "adp": float((counts * picks).sum() / n)}
+        for q in quantiles:
+            out[f"p{int(q * 100)}"] = int(np.searchsorted(cdf, q * n))
+        return out
+
+    def table(self, fmt=None, min_count=1, quantiles=QUANTILES):
+        rows = [self.stats(p, f, quantiles) for (p, f) in self.hists
+                if fmt is None or f == fmt]
+        df = pd.DataFrame([r for r in rows if r["n"] >= min_count])
+        return df.sort_values(["format", "adp"]).reset_index(drop=True) if len(df) else df
+
+    # ─── PERSISTENCE ────────────────────────────────────────────────────────
+    def save(self, path=ADP_SKETCH_NPZ):
+        keys = list(self.hists)
+        lengths = np.array([len(self.hists[k]) for k in keys], dtype=np.int64)
+        np.savez_compressed(
+            path,
+            player_id=np.array([k[0] for k in keys], dtype=str),
+            format=np.array([k[1] for k in keys], dtype=str),
+            offsets=np.r_[0, np.cumsum(lengths)],
+            counts=np.concatenate([self.hists[k] for k in keys]) if keys else np.empty(0, np.int64),
+            leagues=np.array(sorted(self.leagues), dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path=ADP_SKETCH_NPZ):
+        store = cls()
+        if not os.path.exists(path):
+            return store
+        data = np.load(path)
+        # a store saved without its league list can't be updated safely; rebuild it
+        if "leagues" not in data.files:
+            return store
+        store.leagues = set(data["leagues"].tolist())
+        offsets, counts = data["offsets"], data["counts"]
+        for i, key in enumerate(zip(data["player_id"], data["format"])):
+            store.hists[(str(key[0]), str(key[1]))] = counts[offsets[i]:offsets[i + 1]].copy()
+        return store
+
+    @classmethod
+    def merge_files(cls, paths):
+        store = cls()
+        for path in paths:
+            store.merge(cls.load(path))
+        return store
+
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────
+def main():
+    # only leagues the store hasn't seen (s2 / merge output, crawler runs cut short) are folded in;
+    # delete the npz to rebuild from scratch
+    store = AdpStore.load()
+    known = len(store.leagues)
+    store.update(load_drafts(), format_key(load_info()))
+    store.save()
+    print(f"Folded {len(store.leagues) - known} new leagues; saved {len(store)} ADP sketches to {ADP_SKETCH_NPZ}")
+    save_output(store.table(), "adp_by_format.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from common import (MASTER_MATCHUPS_CSV, OUTPUT_DIR, format_key, load_drafts,
+                    load_info)
+from draft_features import POS_INDEX, POSITIONS, league_settings
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+AVAILABILITY_NPZ = os.path.join(OUTPUT_DIR, "availability.npz")
+N_JOBS = os.cpu_count() or 1
+
+
+# ─── PLAYER POOL ────────────────────────────────────────────────────────────
+def player_pool(drafts, formats, projections=None):
+    """Draftable pool per format: player count and projected points per position.
+
+    The pool for a format is every player drafted in any league of that format.
+    projections maps player_id -> projected season points (0 when missing).
+    """
+    picks = drafts.assign(format=drafts["league_id"].map(formats)).dropna(subset=["format"])
+    players = picks.drop_duplicates(["format", "player_id"])[["format", "player_id", "position"]]
+    players = players[players["position"].isin(POSITIONS)]
+    proj = projections if projections is not None else pd.Series(dtype=float)
+    players = players.assign(proj=players["player_id"].map(proj).fillna(0.0))
+
+    agg = players.groupby(["format", "position"]).agg(count=("proj", "size"), points=("proj", "sum"))
+    # every position gets a column, drafted in this crawl or not
+    columns = pd.MultiIndex.from_product([["count", "points"], POSITIONS])
+    return agg.unstack("position").reindex(columns=columns, fill_value=0).fillna(0)
+
+
+# ─── ENGINE ─────────────────────────────────────────────────────────────────
+def availability_state(picks, pool):
+    """Supply/demand state before every pick, for drafts sorted by (league_id, pick_no).
+
+    Every quantity is a running count within the draft, so each draft is
+    walked once: cumulative sums minus the current pick give the state the
+    drafter saw when they were on the clock.
+
+    Returns dict of (picks x positions) arrays:
+      supply_count   players still available at each position
+      supply_points  projected points still available at each position
+      teams_lacking  teams that haven't filled all their starters at the position
+      open_slots     unfilled starting slots league-wide at the position
+    """
+    n, P = len(picks), len(POSITIONS)
+    pos_idx = picks["position"].map(POS_INDEX).to_numpy()
+    onehot = np.zeros((n, P), dtype=np.float32)
+    onehot[np.arange(n), pos_idx] = 1
+    proj = picks["proj"].to_numpy(dtype=np.float32)
+
+    league = picks["league_id"].to_numpy()
+
+    def before(arr):
+        return pd.DataFrame(arr).groupby(league, sort=False).cumsum().to_numpy() - arr
+
+    fmt = picks["format"].to_numpy()
+    pool_count = pool["count"].reindex(fmt).to_numpy(dtype=np.float32)
+    pool_points = pool["points"].reindex(fmt).to_numpy(dtype=np.float32)
+
+    req = picks[[f"req_{p}" for p in POSITIONS]].to_numpy(dtype=np.float32)
+    n_teams = picks["n_teams"].to_numpy(dtype=np.float32)[:, None]
+    # how many of its own position the picking team holds after this pick
+    have_after = picks.groupby(["league_id", "draft_slot", "position"], sort=False).cumcount().to_numpy() + 1
+    req_own = req[np.arange(n), pos_idx]
+    filled = onehot * (have_after == req_own)[:, None]
+    used = onehot * (have_after <= req_own)[:, None]
+
+    return {
+        "supply_count":  (pool_count - before(onehot)).astype(np.int16),
+        "supply_points": pool_points - before(onehot * proj[:, None]),
+        "teams_lacking": (n_teams * (req > 0) - before(filled)).astype(np.int16),
+        "open_slots":    (n_teams * req - before(used)).astype(np.int16),
+    }
+
+
+def _run_chunk(args):
+    picks, pool = args
+    return availability_state(picks, pool)
+
+
+def build_availability(drafts, info, projections=None, n_jobs=N_JOBS):
+    """Availability state for every pick of every draft, drafts split across processes."""
+    formats = format_key(info)
+    pool = player_pool(drafts, formats, projections)
+
+    picks = drafts[drafts["position"].isin(POSITIONS)]
+    picks = picks.assign(format=picks["league_id"].map(formats)).dropna(subset=["format"])
+    picks = picks.sort_values(["league_id", "pick_no"]).reset_index(drop=True)
+    picks = picks.merge(league_settings(picks, info), on="league_id", how="left")
+    proj = projections if projections is not None else pd.Series(dtype=float)
+    picks["proj"] = picks["player_id"].map(proj).fillna(0.0)
+
+    # whole drafts per chunk so running counts never straddle workers
+    leagues = picks["league_id"].unique()
+    bounds = np.searchsorted(picks["league_id"].to_numpy(),
+                             [grp[0] for grp in np.array_split(leagues, max(n_jobs, 1)) if len(grp)])
+    chunks = [picks.iloc[lo:hi] for lo, hi in zip(bounds, np.r_[bounds[1:], len(picks)])]
+    if n_jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+            parts = list(ex.map(_run_chunk, [(c, pool) for c in chunks]))
+    else:
+        parts = [_run_chunk((c, pool)) for c in chunks]
+
+    state = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    return state, picks[["league_id", "pick_no", "draft_slot", "position", "format"]]
+
+
+def save_availability(state, meta, path=AVAILABILITY_NPZ):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, positions=np.array(POSITIONS),
+                        **{c: meta[c].to_numpy(dtype=str) for c in ("league_id", "position", "format")},
+                        pick_no=meta["pick_no"].to_numpy(), draft_slot=meta["draft_slot"].to_numpy(),
+                        **state)
+    print(f"Saved availability for {len(meta)} picks to {path}")
+
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────
+def main():
+    projections = None
+    if os.path.exists(MASTER_MATCHUPS_CSV):
+        from draft_value import read_batches, season_points_index
+        index = season_points_index(read_batches(MASTER_MATCHUPS_CSV, list_cols=("players_points",)))
+        # a player's typical season across leagues stands in for a projection
+        projections = index.groupby("player_id")["points"].mean()
+
+    state, meta = build_availability(load_drafts(), load_info(), projections)
+    save_availability(state, meta)
+
+
+if __name__ == "__main__":
+    main()
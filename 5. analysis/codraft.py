@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from common import format_key, load_drafts, load_info, save_output
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+# team-drafts folded into the co-occurrence matrix per sparse product
+CHUNK_ROWS = 200_000
+# pairs seen fewer times than this are too noisy to report
+MIN_PAIR_COUNT = 5
+TOP_K = 10
+# a pick this many picks ahead of (or behind) the format's ADP counts as a reach (or a fall)
+REACH_PICKS = 12
+
+
+# ─── INCIDENCE ──────────────────────────────────────────────────────────────
+def encode_rosters(drafts):
+    """Integer codes for every (draft, roster) row and every player.
+
+    Returns (row_codes, player_codes, players) aligned with drafts, where
+    players[player_codes] recovers the player_id.
+    """
+    row_codes = pd.factorize(drafts["league_id"].astype(str) + "|" + drafts["draft_slot"].astype(str))[0]
+    player_codes, players = pd.factorize(drafts["player_id"])
+    return row_codes, player_codes, np.asarray(players)
+
+
+def cooccurrence(row_codes, player_codes, n_players, chunk_rows=CHUNK_ROWS):
+    """Player x player co-draft counts, C = M.T @ M summed over row chunks.
+
+    Only one chunk of the incidence matrix M is materialised at a time, so
+    memory is bounded by chunk_rows plus the (sparse) result. The diagonal
+    holds how many rosters drafted each player.
+    """
+    order = np.argsort(row_codes, kind="stable")
+    row_codes, player_codes = row_codes[order], player_codes[order]
+    n_rows = int(row_codes.max()) + 1 if len(row_codes) else 0
+
+    counts = sparse.csr_matrix((n_players, n_players), dtype=np.int64)
+    for start in range(0, n_rows, chunk_rows):
+        lo, hi = np.searchsorted(row_codes, [start, start + chunk_rows])
+        M = sparse.csr_matrix(
+            (np.ones(hi - lo, dtype=np.int64), (row_codes[lo:hi] - start, player_codes[lo:hi])),
+            shape=(min(chunk_rows, n_rows - start), n_players),
+        )
+        # a player drafted twice by one roster (re-picked keeper) still counts once
+        M.data[:] = 1
+        counts = counts + (M.T @ M)
+    return counts.tocsr(), n_rows
+
+
+# ─── ASSOCIATION RULES ──────────────────────────────────────────────────────
+def association_rules(counts, n_rows, players, min_count=MIN_PAIR_COUNT):
+    """Support, confidence and lift for every co-drafted pair (a -> b)."""
+    item = counts.diagonal().astype(float)
+    pairs = sparse.triu(counts, k=1).tocoo()
+    keep = pairs.data >= min_count
+    a, b, n_ab = pairs.row[keep], pairs.col[keep], pairs.data[keep].astype(float)
+
+    # both directions, the pair matrix is symmetric
+    a, b, n_ab = np.r_[a, b], np.r_[b, a], np.r_[n_ab, n_ab]
+    return pd.DataFrame({
+        "player_a":   players[a],
+        "player_b":   players[b],
+        "count":      n_ab.astype(int),
+        "support":    n_ab / n_rows,
+        "confidence": n_ab / item[a],
+        "lift":       n_ab * n_rows / (item[a] * item[b]),
+    })
+
+
+def top_partners(rules, k=TOP_K, by="lift"):
+    """The k strongest partners of each player, no per-player loop."""
+    ranked = rules.sort_values(["player_a", by], ascending=[True, False])
+    ranked["rank"] = ranked.groupby("player_a").cumcount() + 1
+    return ranked[ranked["rank"] <= k].reset_index(drop=True)
+
+
+# ─── REACHES ────────────────────────────────────────────────────────────────
+def reach_scores(drafts, formats, reach_picks=REACH_PICKS):
+    """How far ahead of the player's ADP in that league format each pick was made.
+
+    ADP is taken within format_key (scoring, superflex, team count), since a
+    player's average pick in 12-team superflex says little about 10-team 1QB.
+    Positive reach = taken earlier than usual; reach_rounds scales it by team
+    count. Per (player, format) the mean reach is zero by construction, so the
+    summary reports its spread and how often the player went well early / late.
+    """
+    picks = drafts[["league_id", "draft_slot", "pick_no", "player_id", "position"]].copy()
+    picks["format"] = picks["league_id"].map(formats).fillna("unknown")
+    teams = picks["format"].str.rsplit("_", n=1).str[-1]
+    teams = pd.to_numeric(teams, errors="coerce").where(lambda t: t > 0)
+    picks["adp"] = picks.groupby(["format", "player_id"])["pick_no"].transform("mean")
+    picks["reach"] = picks["adp"] - picks["pick_no"]
+    picks["reach_rounds"] = picks["reach"] / teams
+    picks["early"] = picks["reach"] > reach_picks
+    picks["late"] = picks["reach"] < -reach_picks
+    by_player = (
+        picks.groupby(["player_id", "format"])
+             .agg(position=("position", "first"), adp=("adp", "first"), n=("reach", "size"),
+                  reach_sd=("reach", "std"), reach_sd_rounds=("reach_rounds", "std"),
+                  max_reach=("reach", "max"), early_share=("early", "mean"), late_share=("late", "mean"))
+             .reset_index()
+             .sort_values(["format", "adp"])
+    )
+    return picks, by_player.round(3)
+
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────
+def main():
+    drafts = load_drafts()
+    row_codes, player_codes, players = encode_rosters(drafts)
+    counts, n_rows = cooccurrence(row_codes, player_codes, len(players))
+    print(f"Co-occurrence over {n_rows} rosters x {len(players)} players, {counts.nnz} nonzeros")
+
+    rules = association_rules(counts, n_rows, players)
+    save_output(top_partners(rules), "codraft_top_partners.csv")
+    save_output(reach_scores(drafts, format_key(load_info()))[1], "player_reaches.csv")
+
+
+if __name__ == "__main__":
+    main()
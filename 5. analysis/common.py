@@ -0,0 +1,163 @@
+import os
+import sys
+import ast
+import pandas as pd
+
+# ─── PROJECT BASE ────────────────────────────────────────────────────────────
+# this file lives in <repo>/5. analysis/
+BASE_DIR     = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+from profiling import profiled, section, add_rows
+
+# ─── PATHS ───────────────────────────────────────────────────────────────────
+LEAGUE_IDS_DIR      = os.path.join(BASE_DIR, "2. league_ids")
+RAW_DATA_DIR        = os.path.join(BASE_DIR, "3. raw_data")
+OUTPUT_DIR          = os.path.join(BASE_DIR, "6. outputs")
+
+MASTER_INFO_CSV     = os.path.join(RAW_DATA_DIR, "master_info.csv")
+MASTER_DRAFTS_CSV   = os.path.join(RAW_DATA_DIR, "master_drafts.csv")
+MASTER_MATCHUPS_CSV = os.path.join(RAW_DATA_DIR, "master_matchups.csv")
+PLAYERS_CSV         = os.path.join(RAW_DATA_DIR, "players_sleeper.csv")
+
+# ─── ROSTER SLOTS ────────────────────────────────────────────────────────────
+# slots that never score for the team
+NON_STARTER_SLOTS = {"BN", "IR", "TAXI"}
+
+# which player positions can fill each starting slot
+SLOT_ELIGIBILITY = {
+    "QB":         {"QB"},
+    "RB":         {"RB"},
+    "WR":         {"WR"},
+    "TE":         {"TE"},
+    "K":          {"K"},
+    "DEF":        {"DEF"},
+    "DL":         {"DL"},
+    "LB":         {"LB"},
+    "DB":         {"DB"},
+    "FLEX":       {"RB", "WR", "TE"},
+    "WRRB_FLEX":  {"RB", "WR"},
+    "REC_FLEX":   {"WR", "TE"},
+    "SUPER_FLEX": {"QB", "RB", "WR", "TE"},
+    "IDP_FLEX":   {"DL", "LB", "DB"},
+}
+
+# id columns must stay strings, read as floats they lose precision
+ID_DTYPES = {
+    "league_id":  str,
+    "draft_id":   str,
+    "player_id":  str,
+    "picked_by":  str,
+    "roster_id":  str,
+    "matchup_id": str,
+}
+
+
+# ─── HELPERS ──────────────────────────────────────────────────────────────────
+def safe_literal_eval(val):
+    try:
+        return ast.literal_eval(val)
+    except (ValueError, SyntaxError, TypeError):
+        return []
+
+
+def starting_slots(roster_positions):
+    """Starting slots of a roster template, in lineup order."""
+    if isinstance(roster_positions, str):
+        roster_positions = safe_literal_eval(roster_positions)
+    return [s for s in roster_positions or [] if s not in NON_STARTER_SLOTS]
+
+
+def slot_labels(slots):
+    """Number repeated slots in lineup order: RB, RB, FLEX -> RB1, RB2, FLEX."""
+    totals = pd.Series(slots).value_counts().to_dict()
+    seen, labels = {}, []
+    for s in slots:
+        seen[s] = seen.get(s, 0) + 1
+        labels.append(f"{s}{seen[s]}" if totals[s] > 1 else s)
+    return labels
+
+
+@profiled()
+def load_info(path=MASTER_INFO_CSV):
+    info = pd.read_csv(path, dtype={"league_id": str})
+    add_rows(len(info))
+    return info.dropna(subset=["roster_positions"]).reset_index(drop=True)
+
+
+@profiled()
+def load_drafts(path=MASTER_DRAFTS_CSV):
+    """master_drafts with the stray merge columns (_x/_y) folded back in."""
+    drafts = pd.read_csv(path, dtype={c: str for c in
+                                      ["league_id", "draft_id", "player_id",
+                                       "picked_by", "draft_id_x", "player_id_x",
+                                       "picked_by_x", "draft_id_y", "player_id_y",
+                                       "picked_by_y"]})
+    base = ["draft_id", "draft_slot", "is_keeper", "player_id", "position", "picked_by"]
+    for col in base:
+        for suffix in ("_x", "_y"):
+            if col + suffix in drafts.columns:
+                drafts[col] = drafts[col].fillna(drafts[col + suffix])
+    # draft_time (start_time, epoch ms) and season only exist for leagues crawled after they were added
+    drafts = drafts[["league_id", "pick_no"] + base + [c for c in ["draft_time", "season"] if c in drafts]]
+    # ids that went through a float column come back as "4984.0"
+    for col in ("player_id", "picked_by"):
+        drafts[col] = drafts[col].str.replace(r"\.0$", "", regex=True)
+    drafts = drafts.dropna(subset=["player_id", "draft_slot"])
+    drafts["draft_slot"] = drafts["draft_slot"].astype(int)
+    drafts["pick_no"] = drafts["pick_no"].astype(int)
+    drafts["is_keeper"] = drafts["is_keeper"].fillna(False).astype(bool)
+    add_rows(len(drafts))
+    return drafts.sort_values(["league_id", "pick_no"]).reset_index(drop=True)
+
+
+@profiled()
+def load_matchups(path=MASTER_MATCHUPS_CSV, list_cols=("starters", "starters_points")):
+    with section("read_csv"):
+        matchups = pd.read_csv(path, dtype=ID_DTYPES)
+    with section("literal_eval"):
+        for col in list_cols:
+            matchups[col] = matchups[col].fillna("[]").apply(safe_literal_eval)
+    add_rows(len(matchups))
+    return matchups
+
+
+def player_positions(drafts=None, path=PLAYERS_CSV):
+    """player_id -> position, from players_sleeper.csv or else the most common drafted position."""
+    if os.path.exists(path):
+        players = pd.read_csv(path, dtype={"player_id": str}, usecols=["player_id", "position"])
+        return players.dropna().drop_duplicates("player_id").set_index("player_id")["position"]
+    if drafts is None:
+        drafts = load_drafts()
+    return drafts.groupby("player_id")["position"].agg(lambda p: p.mode().iat[0])
+
+
+def hash_keys(*cols):
+    """Hash one or more aligned id columns into a single uint64 key per row."""
+    frame = pd.DataFrame({i: pd.Series(c).astype(str).to_numpy() for i, c in enumerate(cols)})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def save_output(df, name):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    out_path = os.path.join(OUTPUT_DIR, name)
+    df.to_csv(out_path, index=False)
+    print(f"Saved {len(df)} rows to {out_path}")
+    return out_path
+
+
+def scoring_format(info):
+    """Coarse format label per league: ppr / half_ppr / standard, plus _sf for superflex/2QB."""
+    rec = info["rec"].fillna(0) if "rec" in info else pd.Series(0.0, index=info.index)
+    label = pd.Series("standard", index=info.index)
+    label[rec >= 0.5] = "half_ppr"
+    label[rec >= 1] = "ppr"
+    qbs = info["roster_positions"].apply(
+        lambda rp: sum(s in ("QB", "SUPER_FLEX") for s in starting_slots(rp)))
+    label[qbs >= 2] += "_sf"
+    return pd.Series(label.values, index=info["league_id"].values, name="format")
+
+
+def format_key(info):
+    """Scoring format plus team count per league, e.g. ppr_sf_12."""
+    teams = info["num_teams"].fillna(0).astype(int).astype(str).to_numpy()
+    return scoring_format(info) + "_" + teams
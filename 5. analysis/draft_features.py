@@ -0,0 +1,181 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from common import OUTPUT_DIR, load_drafts, load_info, starting_slots
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+POSITIONS = ["QB", "RB", "WR", "TE", "K", "DEF", "DL", "LB", "DB"]
+FLEX_SLOTS = ["FLEX", "WRRB_FLEX", "REC_FLEX", "IDP_FLEX"]
+
+FEATURE_NAMES = (
+    ["pick_no", "round", "pick_in_round", "draft_slot", "n_teams",
+     "picks_until_next", "n_flex", "n_superflex"]
+    + [f"have_{p}" for p in POSITIONS]
+    + [f"need_{p}" for p in POSITIONS]
+    + [f"taken_{p}" for p in POSITIONS]
+)
+
+FEATURE_STORE_NPZ = os.path.join(OUTPUT_DIR, "draft_features.npz")
+POS_INDEX = {p: i for i, p in enumerate(POSITIONS)}
+
+
+# ─── LEAGUE SETTINGS ────────────────────────────────────────────────────────
+def slot_requirements(roster_positions):
+    """Dedicated starters per position plus flex/superflex counts for one roster template."""
+    slots = starting_slots(roster_positions)
+    req = np.array([slots.count(p) for p in POSITIONS], dtype=np.float32)
+    n_flex = sum(slots.count(s) for s in FLEX_SLOTS)
+    return req, n_flex, slots.count("SUPER_FLEX")
+
+
+def league_settings(drafts, info):
+    """Per-league team count and slot requirements, one row per league in drafts."""
+    leagues = pd.DataFrame({"league_id": drafts["league_id"].unique()})
+    teams = drafts.groupby("league_id")["draft_slot"].max().rename("max_slot")
+    leagues = leagues.merge(teams, left_on="league_id", right_index=True, how="left")
+    leagues = leagues.merge(info[["league_id", "num_teams", "roster_positions"]],
+                            on="league_id", how="left")
+    leagues["n_teams"] = leagues["num_teams"].fillna(leagues["max_slot"]).astype(int)
+
+    reqs = [slot_requirements(rp if isinstance(rp, str) else "[]") for rp in leagues["roster_positions"]]
+    leagues["n_flex"] = [r[1] for r in reqs]
+    leagues["n_superflex"] = [r[2] for r in reqs]
+    req = pd.DataFrame(np.vstack([r[0] for r in reqs]) if reqs else np.empty((0, len(POSITIONS))),
+                       columns=[f"req_{p}" for p in POSITIONS])
+    return pd.concat([leagues[["league_id", "n_teams", "n_flex", "n_superflex"]], req], axis=1)
+
+
+def picks_until_next(pick_no, draft_slot, n_teams):
+    """Picks between this one and the same team's next pick in a snake draft."""
+    pick_no, draft_slot, n_teams = (np.asarray(a) for a in (pick_no, draft_slot, n_teams))
+    rnd = (pick_no - 1) // n_teams + 1
+    # next round runs the other way: odd rounds are 1..T, even rounds T..1
+    next_pos = np.where(rnd % 2 == 1, n_teams - draft_slot + 1, draft_slot)
+    return rnd * n_teams + next_pos - pick_no
+
+
+# ─── FEATURE STORE ──────────────────────────────────────────────────────────
+def build_feature_store(drafts, info):
+    """Fixed-width draft-state features for every pick, one linear pass per draft.
+
+    Roster composition and league-wide counts are running (cumulative) sums
+    over the draft in pick_no order, shifted by one so every row only sees
+    the picks made before it.
+
+    Returns (X float32 [picks x features], y int8 position index, meta).
+    """
+    drafts = drafts[drafts["position"].isin(POSITIONS)]
+    drafts = drafts.sort_values(["league_id", "pick_no"]).reset_index(drop=True)
+    settings = league_settings(drafts, info)
+    picks = drafts[["league_id", "pick_no", "draft_slot", "position"]].merge(
+        settings, on="league_id", how="left")
+
+    y = picks["position"].map(POS_INDEX).to_numpy(dtype=np.int8)
+    onehot = np.zeros((len(picks), len(POSITIONS)), dtype=np.float32)
+    onehot[np.arange(len(picks)), y] = 1
+
+    onehot_df = pd.DataFrame(onehot)
+    have = onehot_df.groupby([picks["league_id"], picks["draft_slot"]]).cumsum().to_numpy() - onehot
+    taken = onehot_df.groupby(picks["league_id"]).cumsum().to_numpy() - onehot
+    req = picks[[f"req_{p}" for p in POSITIONS]].to_numpy(dtype=np.float32)
+
+    n_teams = picks["n_teams"].to_numpy()
+    pick_no = picks["pick_no"].to_numpy()
+    draft_slot = picks["draft_slot"].to_numpy()
+    head = np.column_stack([
+        pick_no,
+        (pick_no - 1) // n_teams + 1,
+        (pick_no - 1) % n_teams + 1,
+        draft_slot,
+        n_teams,
+        picks_until_next(pick_no, draft_slot, n_teams),
+        picks["n_flex"].to_numpy(),
+        picks["n_superflex"].to_numpy(),
+    ]).astype(np.float32)
+
+    X = np.hstack([head, have, np.maximum(req - have, 0), taken]).astype(np.float32)
+    return X, y, picks[["league_id", "pick_no", "draft_slot"]]
+
+
+def save_feature_store(X, y, meta, path=FEATURE_STORE_NPZ):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, X=X, y=y, league_id=meta["league_id"].to_numpy(dtype=str),
+             pick_no=meta["pick_no"].to_numpy(), feature_names=np.array(FEATURE_NAMES))
+    print(f"Saved {X.shape[0]} x {X.shape[1]} feature store to {path}")
+
+
+def load_feature_store(path=FEATURE_STORE_NPZ):
+    data = np.load(path)
+    meta = pd.DataFrame({"league_id": data["league_id"], "pick_no": data["pick_no"]})
+    return data["X"], data["y"], meta
+
+
+# ─── LIVE SCORING ───────────────────────────────────────────────────────────
+def state_features(draft_state):
+    """Feature row for one live draft state.
+
+    draft_state keys: pick_no, draft_slot, n_teams, roster_positions and
+    picks, a list of (draft_slot, position) already made in pick order.
+    """
+    pick_no, slot, teams = draft_state["pick_no"], draft_state["draft_slot"], draft_state["n_teams"]
+    req, n_flex, n_superflex = slot_requirements(draft_state["roster_positions"])
+
+    have = np.zeros(len(POSITIONS), dtype=np.float32)
+    taken = np.zeros(len(POSITIONS), dtype=np.float32)
+    for s, pos in draft_state["picks"]:
+        if pos in POS_INDEX:
+            taken[POS_INDEX[pos]] += 1
+            if s == slot:
+                have[POS_INDEX[pos]] += 1
+
+    head = np.array([
+        pick_no, (pick_no - 1) // teams + 1, (pick_no - 1) % teams + 1, slot, teams,
+        picks_until_next(pick_no, slot, teams), n_flex, n_superflex,
+    ], dtype=np.float32)
+    return np.concatenate([head, have, np.maximum(req - have, 0), taken])
+
+
+class PickPredictor:
+    """Multinomial logit over draft-state features, scored with plain numpy."""
+
+    def __init__(self, C=1.0):
+        self.C = C
+
+    def fit(self, X, y):
+        self.mean_ = X.mean(axis=0)
+        self.scale_ = X.std(axis=0) + 1e-6
+        model = LogisticRegression(C=self.C, max_iter=1000)
+        model.fit((X - self.mean_) / self.scale_, y)
+        # fold the standardisation into the weights so scoring is one matvec
+        self.classes_ = [POSITIONS[c] for c in model.classes_]
+        self.coef_ = (model.coef_ / self.scale_).astype(np.float32)
+        self.intercept_ = (model.intercept_ - self.coef_ @ self.mean_).astype(np.float32)
+        return self
+
+    def predict_proba(self, X):
+        z = np.atleast_2d(X) @ self.coef_.T + self.intercept_
+        z = np.exp(z - z.max(axis=1, keepdims=True))
+        return z / z.sum(axis=1, keepdims=True)
+
+    def predict(self, draft_state):
+        """Position probabilities for the next pick of a live draft."""
+        proba = self.predict_proba(state_features(draft_state))[0]
+        return dict(zip(self.classes_, proba.tolist()))
+
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────
+def main():
+    X, y, meta = build_feature_store(load_drafts(), load_info())
+    save_feature_store(X, y, meta)
+
+    model = PickPredictor().fit(X, y)
+    acc = (np.argmax(model.predict_proba(X), axis=1) == pd.Series(y).map(
+        {POS_INDEX[c]: i for i, c in enumerate(model.classes_)}).to_numpy()).mean()
+    print(f"In-sample position accuracy: {acc:.3f}")
+
+
+if __name__ == "__main__":
+    main()
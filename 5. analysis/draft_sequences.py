@@ -0,0 +1,172 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from common import (MASTER_MATCHUPS_CSV, OUTPUT_DIR, load_drafts, load_matchups,
+                    save_output)
+from draft_features import POSITIONS
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+# position codes are 1..len(POSITIONS), 0 is padding; prefixes pack base-BASE into int64
+BASE = len(POSITIONS) + 1
+MAX_DEPTH = 18
+SEQUENCE_TRIE_NPZ = os.path.join(OUTPUT_DIR, "sequence_trie.npz")
+
+
+# ─── ENCODING ───────────────────────────────────────────────────────────────
+def encode_sequences(drafts, max_depth=MAX_DEPTH):
+    """(team-drafts x rounds) int8 matrix of position codes, in pick order.
+
+    Returns (codes, keys) where keys has league_id/draft_slot per row.
+    """
+    picks = drafts[drafts["position"].isin(POSITIONS)].sort_values(["league_id", "draft_slot", "pick_no"])
+    team = pd.factorize(picks["league_id"] + "|" + picks["draft_slot"].astype(str))[0]
+    rnd = picks.groupby(team).cumcount().to_numpy()
+    keep = rnd < max_depth
+
+    codes = np.zeros((team.max() + 1 if len(team) else 0, max_depth), dtype=np.int8)
+    codes[team[keep], rnd[keep]] = picks["position"].map({p: i + 1 for i, p in enumerate(POSITIONS)}).to_numpy()[keep]
+    keys = picks.drop_duplicates(subset=["league_id", "draft_slot"])[["league_id", "draft_slot"]].reset_index(drop=True)
+    return codes, keys
+
+
+def decode_prefix(code, depth):
+    out = []
+    for _ in range(depth):
+        code, digit = divmod(int(code), BASE)
+        out.append(POSITIONS[digit - 1])
+    return "-".join(reversed(out))
+
+
+def encode_prefix(prefix):
+    """'RB-RB-WR' (or a list of positions) -> (code, depth)."""
+    if isinstance(prefix, str):
+        prefix = prefix.split("-") if prefix else []
+    code = 0
+    for pos in prefix:
+        code = code * BASE + POSITIONS.index(pos) + 1
+    return code, len(prefix)
+
+
+# ─── OUTCOMES ───────────────────────────────────────────────────────────────
+def season_win_pct(matchups):
+    """Win share per (league_id, roster_id); roster_id follows draft_slot as in s2.
+
+    A tied week counts as half a win for each side.
+    """
+    m = matchups.dropna(subset=["matchup_id"])
+    games = m.groupby(["league_id", "week", "matchup_id"])["points"]
+    top = m["points"] == games.transform("max")
+    n_top = top.groupby([m["league_id"], m["week"], m["matchup_id"]]).transform("sum")
+    m = m.assign(win=np.where(top & (games.transform("size") == 2), 1.0 / n_top, 0.0))
+    return m.groupby(["league_id", "roster_id"])["win"].mean()
+
+
+# ─── TRIE ───────────────────────────────────────────────────────────────────
+class SequenceTrie:
+    """Prefix counts and mean outcome for every drafted position sequence.
+
+    Level d holds the sorted integer codes of every length-d prefix seen,
+    with counts and outcome sums alongside, so a prefix lookup is a binary
+    search and its subtree is a contiguous code range at deeper levels.
+    """
+
+    def __init__(self, levels):
+        self.levels = levels
+
+    @classmethod
+    def build(cls, codes, outcomes=None):
+        outcomes = np.full(len(codes), np.nan) if outcomes is None else np.asarray(outcomes, dtype=float)
+        has = ~np.isnan(outcomes)
+        prefix = np.zeros(len(codes), dtype=np.int64)
+        levels = {}
+        for d in range(codes.shape[1]):
+            alive = codes[:, d] > 0
+            prefix = prefix * BASE + codes[:, d]
+            if not alive.any():
+                break
+            uniq, inv = np.unique(prefix[alive], return_inverse=True)
+            levels[d + 1] = {
+                "code": uniq,
+                "count": np.bincount(inv, minlength=len(uniq)),
+                "n_outcome": np.bincount(inv, weights=has[alive], minlength=len(uniq)),
+                "sum_outcome": np.bincount(inv, weights=np.where(has, outcomes, 0)[alive], minlength=len(uniq)),
+            }
+        return cls(levels)
+
+    def _frame(self, depth, sl=slice(None)):
+        lvl = self.levels[depth]
+        n_out = lvl["n_outcome"][sl]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = lvl["sum_outcome"][sl] / n_out
+        return pd.DataFrame({
+            "code": lvl["code"][sl], "count": lvl["count"][sl],
+            "mean_outcome": np.where(n_out > 0, mean, np.nan),
+        })
+
+    def lookup(self, prefix):
+        code, depth = encode_prefix(prefix)
+        lvl = self.levels.get(depth)
+        if lvl is None:
+            return None
+        i = np.searchsorted(lvl["code"], code)
+        if i == len(lvl["code"]) or lvl["code"][i] != code:
+            return None
+        row = self._frame(depth, slice(i, i + 1)).iloc[0]
+        return {"sequence": decode_prefix(code, depth), "count": int(row["count"]),
+                "mean_outcome": float(row["mean_outcome"])}
+
+    def children(self, prefix, depth=1):
+        """Every continuation of prefix that is `depth` picks longer."""
+        code, d = encode_prefix(prefix)
+        lvl = self.levels.get(d + depth)
+        if lvl is None:
+            return pd.DataFrame(columns=["sequence", "count", "mean_outcome"])
+        lo, hi = np.searchsorted(lvl["code"], [code * BASE ** depth, (code + 1) * BASE ** depth])
+        return self._named(self._frame(d + depth, slice(lo, hi)), d + depth)
+
+    def top(self, k, n=20, by="count", min_count=1):
+        """Top-n strategies through round k, by count or by mean_outcome."""
+        frame = self._frame(k)
+        frame = frame[frame["count"] >= min_count]
+        idx = np.argsort(-frame[by].fillna(-np.inf).to_numpy(), kind="stable")[:n]
+        return self._named(frame.iloc[idx], k)
+
+    @staticmethod
+    def _named(frame, depth):
+        frame = frame.assign(sequence=[decode_prefix(c, depth) for c in frame["code"]])
+        return frame[["sequence", "count", "mean_outcome"]].reset_index(drop=True)
+
+    def save(self, path=SEQUENCE_TRIE_NPZ):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, **{f"{k}:{d}": v for d, lvl in self.levels.items() for k, v in lvl.items()})
+
+    @classmethod
+    def load(cls, path=SEQUENCE_TRIE_NPZ):
+        data = np.load(path)
+        levels = {}
+        for name in data.files:
+            key, d = name.split(":")
+            levels.setdefault(int(d), {})[key] = data[name]
+        return cls(levels)
+
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────
+def main():
+    codes, keys = encode_sequences(load_drafts())
+    outcomes = None
+    if os.path.exists(MASTER_MATCHUPS_CSV):
+        win_pct = season_win_pct(load_matchups(list_cols=()))
+        idx = pd.MultiIndex.from_arrays([keys["league_id"], keys["draft_slot"].astype(str)])
+        outcomes = win_pct.reindex(idx).to_numpy()
+
+    trie = SequenceTrie.build(codes, outcomes)
+    trie.save()
+    print(f"Built sequence trie over {len(codes)} team-drafts")
+    for k in (2, 3, 4):
+        save_output(trie.top(k, n=50), f"top_sequences_round{k}.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from common import (BASE_DIR, MASTER_MATCHUPS_CSV, SLOT_ELIGIBILITY, hash_keys,
+                    load_drafts, load_info, player_positions, save_output,
+                    scoring_format, starting_slots)
+
+sys.path.insert(0, os.path.join(BASE_DIR, "4. cleaning_processing", "matchups"))
+from matchup_stream import read_batches
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+# how often each position ends up in a flex slot; shares for a slot sum to 1
+FLEX_SHARE = {
+    "FLEX":       {"RB": 0.45, "WR": 0.45, "TE": 0.10},
+    "WRRB_FLEX":  {"RB": 0.50, "WR": 0.50},
+    "REC_FLEX":   {"WR": 0.80, "TE": 0.20},
+    "SUPER_FLEX": {"QB": 0.85, "RB": 0.05, "WR": 0.05, "TE": 0.05},
+    "IDP_FLEX":   {"DL": 0.30, "LB": 0.40, "DB": 0.30},
+}
+# gaussian kernel width (in picks) for the pick-value curve
+PICK_BANDWIDTH = 6.0
+
+
+# ─── SEASON POINTS INDEX ────────────────────────────────────────────────────
+def season_points_index(batches):
+    """One row per (league_id, player_id) with season points, indexed by a uint64 hash key.
+
+    batches are read_batches(list_cols=("players_points",)) pairs; the dicts
+    arrive already flattened, and since a league never straddles two batches
+    each batch's totals are final. Lookups afterwards are a single hash-table
+    get_indexer over the whole draft table.
+    """
+    parts = []
+    for frame, lists in batches:
+        pids, vals, lens = lists["players_points"]
+        lids = np.repeat(frame["league_id"].to_numpy(), lens)
+        long = pd.DataFrame({"key": hash_keys(lids, pids), "league_id": lids,
+                             "player_id": pids, "points": vals})
+        parts.append(long.groupby("key", sort=False).agg(
+            league_id=("league_id", "first"),
+            player_id=("player_id", "first"),
+            points=("points", "sum"),
+        ))
+    if not parts:
+        return pd.DataFrame(columns=["league_id", "player_id", "points"], index=pd.Index([], name="key"))
+    return pd.concat(parts)
+
+
+def lookup_points(index, league_ids, player_ids):
+    """Season points for aligned (league_id, player_id) arrays, 0 when never rostered."""
+    pos = index.index.get_indexer(hash_keys(league_ids, player_ids))
+    return np.where(pos >= 0, index["points"].to_numpy()[pos], 0.0)
+
+
+def league_scoring_stats(matchups):
+    """Weeks played and the spread of weekly score differentials, per league."""
+    stats = matchups.groupby("league_id").agg(
+        n_weeks=("week", "nunique"),
+        sd_points=("points", "std"),
+    )
+    # team minus opponent, both drawn from the same weekly distribution
+    stats["sd_diff"] = stats["sd_points"] * np.sqrt(2)
+    return stats
+
+
+# ─── REPLACEMENT LEVEL ──────────────────────────────────────────────────────
+def starter_counts(info, rosters=None):
+    """Expected league-wide starters per (league_id, position) from roster_positions.
+
+    Leagues whose info has no num_teams take the roster count from `rosters`
+    (league_id -> rosters seen in matchups); leagues with neither are skipped.
+    """
+    teams = info["num_teams"]
+    if rosters is not None:
+        teams = teams.fillna(info["league_id"].map(rosters))
+    rows = []
+    for lid, rp, n_teams in zip(info["league_id"], info["roster_positions"], teams):
+        if pd.isna(n_teams):
+            continue
+        counts = {}
+        for slot in starting_slots(rp):
+            shares = FLEX_SHARE.get(slot) or {p: 1.0 for p in SLOT_ELIGIBILITY.get(slot, {slot})}
+            for pos, share in shares.items():
+                counts[pos] = counts.get(pos, 0.0) + share
+        rows += [(lid, pos, n * int(n_teams)) for pos, n in counts.items()]
+    return pd.DataFrame(rows, columns=["league_id", "position", "n_starters"])
+
+
+def replacement_levels(index, positions, starters):
+    """Season points of the best non-starter at each position in each league."""
+    pool = index[["league_id", "player_id", "points"]].copy()
+    pool["position"] = pool["player_id"].map(positions)
+    pool["rank"] = pool.groupby(["league_id", "position"])["points"].rank(
+        ascending=False, method="first")
+
+    target = starters.assign(rank=np.floor(starters["n_starters"]) + 1)
+    repl = target.merge(pool, on=["league_id", "position", "rank"], how="left")
+    # pool smaller than the starter count -> freely available players score nothing
+    repl["replacement_points"] = repl["points"].fillna(0.0)
+    return repl[["league_id", "position", "n_starters", "replacement_points"]]
+
+
+# ─── PICK VALUES ────────────────────────────────────────────────────────────
+def pick_values(drafts, index, repl, stats):
+    """Season points, VORP and WAR for every pick in every draft."""
+    picks = drafts[["league_id", "draft_id", "pick_no", "draft_slot", "player_id", "position"]].copy()
+    picks["season_points"] = lookup_points(index, picks["league_id"], picks["player_id"])
+    picks = picks.merge(repl[["league_id", "position", "replacement_points"]],
+                        on=["league_id", "position"], how="left")
+    picks = picks.merge(stats[["n_weeks", "sd_diff"]], left_on="league_id",
+                        right_index=True, how="left")
+
+    picks["vorp"] = picks["season_points"] - picks["replacement_points"].fillna(0.0)
+    # wins an average team gains per season by swapping replacement for this player
+    weekly_edge = picks["vorp"] / picks["n_weeks"]
+    picks["war"] = picks["n_weeks"] * (ndtr(weekly_edge / picks["sd_diff"]) - 0.5)
+    return picks.drop(columns=["n_weeks", "sd_diff"])
+
+
+def pick_value_curve(picks, formats, bandwidth=PICK_BANDWIDTH):
+    """Kernel-smoothed VORP/WAR by pick_no for each (format, position)."""
+    picks = picks.assign(format=picks["league_id"].map(formats)).dropna(subset=["war"])
+    means = (
+        picks.groupby(["format", "position", "pick_no"])
+             .agg(vorp=("vorp", "mean"), war=("war", "mean"), n=("vorp", "size"))
+             .reset_index()
+    )
+    curves = []
+    for (fmt, pos), grp in means.groupby(["format", "position"]):
+        at = grp["pick_no"].to_numpy(dtype=float)
+        # every pick weighted by its sample size and distance to every other pick
+        w = np.exp(-0.5 * ((at[:, None] - at[None, :]) / bandwidth) ** 2) * grp["n"].to_numpy()
+        w /= w.sum(axis=1, keepdims=True)
+        curves.append(pd.DataFrame({
+            "format": fmt, "position": pos, "pick_no": grp["pick_no"].to_numpy(),
+            "n": grp["n"].to_numpy(),
+            "vorp_smooth": w @ grp["vorp"].to_numpy(),
+            "war_smooth": w @ grp["war"].to_numpy(),
+        }))
+    return pd.concat(curves, ignore_index=True)
+
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────
+def main():
+    info = load_info()
+    drafts = load_drafts()
+    frames = []
+
+    def batches():
+        for frame, lists in read_batches(MASTER_MATCHUPS_CSV, list_cols=("players_points",)):
+            frames.append(frame)
+            yield frame, lists
+
+    index = season_points_index(batches())
+    matchups = pd.concat(frames, ignore_index=True)
+    print(f"Indexed {len(index)} (league, player) season totals")
+    rosters = matchups.groupby("league_id")["roster_id"].nunique()
+    repl = replacement_levels(index, player_positions(drafts), starter_counts(info, rosters))
+    picks = pick_values(drafts, index, repl, league_scoring_stats(matchups))
+    curve = pick_value_curve(picks, scoring_format(info))
+
+    save_output(picks, "pick_values.csv")
+    save_output(curve, "pick_value_curve.csv")
+
+
+if __name__ == "__main__":
+    main()
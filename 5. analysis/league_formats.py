@@ -0,0 +1,151 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from common import OUTPUT_DIR, RAW_DATA_DIR, load_info, safe_literal_eval, save_output
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+DRAFTS_DIR = os.path.join(RAW_DATA_DIR, "drafts")
+FORMAT_INDEX_NPZ = os.path.join(OUTPUT_DIR, "format_index.npz")
+
+SLOT_FIELDS = ["qb", "rb", "wr", "te", "flex", "super_flex", "bn"]
+LEAGUE_TYPES = {0: "redraft", 1: "keeper", 2: "dynasty"}
+IDP_SLOTS = {"DL", "LB", "DB", "IDP_FLEX"}
+
+# facets in the order they appear in the format key
+FACETS = ["scoring", "te_premium", "pass_td", "qb", "teams", "league_type", "idp"]
+
+
+# ─── SLOTS ──────────────────────────────────────────────────────────────────
+def draft_slot_settings(drafts_dir=DRAFTS_DIR):
+    """slots_* from the per-league draft csvs written by s2, if any were kept.
+
+    s2's draft files are a merge on draft_id, so league_id comes back as _x/_y;
+    the id is taken from the file name instead, as merge_raw_data does.
+    """
+    slot_cols = [f"slots_{s}" for s in SLOT_FIELDS]
+    frames = []
+    for path in glob.glob(os.path.join(drafts_dir, "*.csv")):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name == "already_done":
+            continue
+        df = pd.read_csv(path, usecols=lambda c: c in slot_cols, nrows=1)
+        df.insert(0, "league_id", name)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["league_id"] + slot_cols)
+    return pd.concat(frames, ignore_index=True).drop_duplicates("league_id")
+
+
+def slot_counts(info, drafts_dir=DRAFTS_DIR):
+    """Per-league slots_* counts, from the draft settings or else roster_positions."""
+    rosters = info["roster_positions"].apply(
+        lambda rp: safe_literal_eval(rp) if isinstance(rp, str) else list(rp))
+    derived = pd.DataFrame({
+        f"slots_{s}": rosters.apply(lambda rp, s=s: rp.count(s.upper()))
+        for s in SLOT_FIELDS
+    })
+    derived.insert(0, "league_id", info["league_id"].to_numpy())
+
+    drafted = draft_slot_settings(drafts_dir)
+    if len(drafted):
+        derived = derived.set_index("league_id")
+        derived.update(drafted.set_index("league_id"))
+        derived = derived.reset_index()
+    derived["idp"] = rosters.apply(lambda rp: any(s in IDP_SLOTS for s in rp)).to_numpy()
+    return derived
+
+
+# ─── CLASSIFIER ─────────────────────────────────────────────────────────────
+def classify_formats(info, drafts_dir=DRAFTS_DIR):
+    """One row per league with each format facet and the compact format key."""
+    slots = slot_counts(info, drafts_dir).set_index("league_id").reindex(info["league_id"])
+
+    def col(name):
+        return info[name].fillna(0).to_numpy() if name in info else np.zeros(len(info))
+
+    rec = col("rec")
+    qbs = slots["slots_qb"].to_numpy()
+    formats = pd.DataFrame({
+        "league_id":   info["league_id"].to_numpy(),
+        "scoring":     np.select([rec >= 1, rec >= 0.5], ["ppr", "half_ppr"], "standard"),
+        "te_premium":  np.where(col("bonus_rec_te") > 0, "tep", "no_tep"),
+        "pass_td":     [f"{int(p)}pt_td" for p in col("pass_td")],
+        "qb":          np.select([qbs >= 2, slots["slots_super_flex"].to_numpy() > 0],
+                                 ["2qb", "superflex"], "1qb"),
+        "teams":       [f"{int(t)}team" for t in col("num_teams")],
+        "league_type": [LEAGUE_TYPES.get(int(t), "other") for t in col("type")],
+        "idp":         np.where(slots["idp"].fillna(False).to_numpy(dtype=bool), "idp", "no_idp"),
+    })
+    formats["format_key"] = formats[FACETS].agg("|".join, axis=1)
+    return formats
+
+
+# ─── PARTITION INDEX ────────────────────────────────────────────────────────
+class FormatIndex:
+    """Inverted index from facet value (or full format key) to a league bitmap.
+
+    Bit i of every bitmap is league_ids[i]; selections AND facets together
+    and never touch master_info again.
+    """
+
+    def __init__(self, league_ids, bitmaps):
+        self.league_ids = np.asarray(league_ids)
+        self.bitmaps = bitmaps
+
+    @classmethod
+    def build(cls, formats):
+        bitmaps = {}
+        for facet in FACETS + ["format_key"]:
+            for value, rows in formats.groupby(facet).indices.items():
+                mask = np.zeros(len(formats), dtype=bool)
+                mask[rows] = True
+                bitmaps[f"{facet}={value}"] = np.packbits(mask)
+        return cls(formats["league_id"].to_numpy(dtype=str), bitmaps)
+
+    def mask(self, **facets):
+        """Boolean mask over league_ids matching every facet=value given."""
+        mask = np.ones(len(self.league_ids), dtype=bool)
+        for facet, value in facets.items():
+            bits = self.bitmaps.get(f"{facet}={value}")
+            if bits is None:
+                return np.zeros(len(self.league_ids), dtype=bool)
+            mask &= np.unpackbits(bits, count=len(self.league_ids)).astype(bool)
+        return mask
+
+    def select(self, **facets):
+        """league_ids matching every facet, e.g. select(scoring="ppr", qb="superflex")."""
+        return self.league_ids[self.mask(**facets)]
+
+    def filter(self, df, **facets):
+        """Rows of any league-keyed table (drafts, matchups) in the selected leagues."""
+        return df[df["league_id"].isin(self.select(**facets))]
+
+    def counts(self):
+        return pd.Series({k: int(np.unpackbits(v).sum()) for k, v in self.bitmaps.items()})
+
+    def save(self, path=FORMAT_INDEX_NPZ):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, league_ids=self.league_ids,
+                            **{f"bm:{k}": v for k, v in self.bitmaps.items()})
+
+    @classmethod
+    def load(cls, path=FORMAT_INDEX_NPZ):
+        data = np.load(path)
+        bitmaps = {k[3:]: data[k] for k in data.files if k.startswith("bm:")}
+        return cls(data["league_ids"], bitmaps)
+
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────
+def main():
+    formats = classify_formats(load_info())
+    index = FormatIndex.build(formats)
+    index.save()
+    save_output(formats, "league_formats.csv")
+    print(index.counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
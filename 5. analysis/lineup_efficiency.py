@@ -0,0 +1,169 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from common import (BASE_DIR, MASTER_MATCHUPS_CSV, OUTPUT_DIR, SLOT_ELIGIBILITY, load_info,
+                    player_positions, save_output, starting_slots)
+from profiling import add_rows, section
+
+sys.path.insert(0, os.path.join(BASE_DIR, "4. cleaning_processing", "matchups"))
+from matchup_stream import CHUNK_ROWS, read_batches
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+LINEUP_EFFICIENCY_CSV = os.path.join(OUTPUT_DIR, "lineup_efficiency.csv")
+
+# positions that can start somewhere; anyone else (OL, unknown ids) only sits on the bench
+POSITIONS = sorted(set().union(*SLOT_ELIGIBILITY.values()))
+POS_CODE = {p: i for i, p in enumerate(POSITIONS)}
+
+
+# ─── TEMPLATES ──────────────────────────────────────────────────────────────
+def compile_template(slots):
+    """Starting slots -> (dedicated count per position, flex eligibility masks, most restrictive first).
+
+    Filling dedicated slots with each position's best players and then every flex
+    slot with the best player left is optimal while the flex sets are nested or
+    disjoint (FLEX inside SUPER_FLEX, IDP_FLEX apart); a template with both
+    WRRB_FLEX and REC_FLEX can in rare weeks come out slightly under the optimum.
+    """
+    counts = np.zeros(len(POSITIONS), dtype=np.int64)
+    flex = []
+    for slot in slots:
+        eligible = SLOT_ELIGIBILITY.get(slot)
+        if not eligible:
+            continue
+        if len(eligible) == 1:
+            counts[POS_CODE[next(iter(eligible))]] += 1
+        else:
+            flex.append(np.array([p in eligible for p in POSITIONS]))
+    flex.sort(key=lambda m: m.sum())
+    return counts, flex
+
+
+def template_depth(template):
+    """Most players of one position a lineup can use: its dedicated slots plus every flex taking it."""
+    counts, flex = template
+    return int((counts + sum(flex, np.zeros(len(POSITIONS), dtype=np.int64))).max(initial=0))
+
+
+def league_templates(info):
+    """league_id -> template number, plus the compiled templates (roster_positions deduplicated)."""
+    slots = info.drop_duplicates("league_id").set_index("league_id")["roster_positions"].map(
+        lambda rp: tuple(starting_slots(rp)))
+    codes, uniques = pd.factorize(slots)
+    return pd.Series(codes, index=slots.index), [compile_template(s) for s in uniques]
+
+
+# ─── LINEUPS ────────────────────────────────────────────────────────────────
+def position_depth(row, pos, pts, n_rows, depth):
+    """(rows x positions x depth) points of each roster's best players per position, best first.
+
+    Rosters that run out of players at a position are padded with 0 (an empty slot).
+    """
+    keep = pos >= 0
+    row, pos, pts = row[keep], pos[keep], np.nan_to_num(pts[keep])
+    order = np.lexsort((-pts, pos, row))
+    row, pos, pts = row[order], pos[order], pts[order]
+    group = row * len(POSITIONS) + pos
+    start = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    rank = np.arange(len(group)) - np.repeat(start, np.diff(np.r_[start, len(group)]))
+    top = rank < depth
+    P = np.zeros((n_rows, len(POSITIONS), depth))
+    P[row[top], pos[top], rank[top]] = pts[top]
+    return P
+
+
+def fill_lineups(P, template):
+    """Optimal starting points per row of P for one slot template."""
+    counts, flex = template
+    rows = np.arange(len(P))
+    cum = np.cumsum(P, axis=2)
+    used = np.flatnonzero(counts)
+    total = cum[:, used, counts[used] - 1].sum(axis=1)
+    # next unused player per position; depth covers every slot a position can fill
+    nxt = np.tile(counts, (len(P), 1))
+    for mask in flex:
+        eligible = np.flatnonzero(mask)
+        cand = P[rows[:, None], eligible, nxt[:, eligible]]
+        best = cand.argmax(axis=1)
+        total += cand[rows, best]
+        nxt[rows, eligible[best]] += 1
+    return total
+
+
+def optimal_points(frame, lists, templates, compiled, position_codes):
+    """Best possible lineup score per row of a matchup batch, NaN for leagues without roster_positions."""
+    ids, pts, lengths = lists["players_points"]
+    row = np.repeat(np.arange(len(frame)), lengths)
+    idx = position_codes.index.get_indexer(ids)
+    pos = np.where(idx >= 0, position_codes.to_numpy()[np.maximum(idx, 0)], -1)
+
+    tid = frame["league_id"].map(templates).fillna(-1).astype(int).to_numpy()
+    present = np.unique(tid[tid >= 0])
+    optimal = np.full(len(frame), np.nan)
+    if not len(present):
+        return optimal
+    depth = max(max(template_depth(compiled[t]) for t in present), 1)
+    P = position_depth(row, pos, pts, len(frame), depth)
+    for t in present:
+        sel = np.flatnonzero(tid == t)
+        optimal[sel] = fill_lineups(P[sel], compiled[t])
+    return optimal
+
+
+def efficiency_frame(frame, optimal):
+    out = frame[[c for c in ["league_id", "season", "week", "roster_id"] if c in frame]].copy()
+    out["actual_points"] = frame["points"].to_numpy()
+    out["optimal_points"] = optimal.round(2)
+    out["points_left"] = (optimal - out["actual_points"]).round(2)
+    out["efficiency"] = np.where(optimal > 0, out["actual_points"] / np.where(optimal > 0, optimal, 1), np.nan)
+    return out
+
+
+def lineup_efficiency(info, positions, path=MASTER_MATCHUPS_CSV, out_path=LINEUP_EFFICIENCY_CSV,
+                      chunksize=CHUNK_ROWS):
+    """Stream optimal / actual points per roster-week to csv; returns the per-manager season totals."""
+    templates, compiled = league_templates(info)
+    position_codes = positions.map(POS_CODE).dropna().astype(int)
+    position_codes = position_codes[~position_codes.index.duplicated()]
+    managers = []
+    for i, (frame, lists) in enumerate(read_batches(path, chunksize, list_cols=("players_points",))):
+        with section("optimal_lineups"):
+            out = efficiency_frame(frame, optimal_points(frame, lists, templates, compiled, position_codes))
+        out.to_csv(out_path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+        add_rows(len(out))
+        # a league never straddles two batches, so its season totals are complete here
+        managers.append(manager_totals(out))
+    return pd.concat(managers, ignore_index=True) if managers else manager_totals(pd.DataFrame(
+        columns=["league_id", "roster_id", "week", "actual_points", "optimal_points", "points_left"]))
+
+
+def manager_totals(weeks):
+    """Season totals per league roster; efficiency is total actual over total optimal points."""
+    keys = [c for c in ["league_id", "season", "roster_id"] if c in weeks]
+    scored = weeks.dropna(subset=["optimal_points"])
+    totals = scored.groupby(keys, observed=True).agg(
+        weeks=("week", "size"),
+        actual_points=("actual_points", "sum"),
+        optimal_points=("optimal_points", "sum"),
+        points_left=("points_left", "sum"),
+    ).reset_index()
+    totals["efficiency"] = totals["actual_points"] / totals["optimal_points"].where(totals["optimal_points"] > 0)
+    return totals.round(4)
+
+
+def main():
+    info = load_info()
+    positions = player_positions()
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    managers = lineup_efficiency(info, positions)
+    print(f"Wrote roster-weeks to {LINEUP_EFFICIENCY_CSV}")
+    save_output(managers.sort_values("efficiency", ascending=False), "lineup_efficiency_by_manager.csv")
+    print(f"median manager efficiency {managers['efficiency'].median():.1%}, "
+          f"{managers['points_left'].sum() / max(managers['weeks'].sum(), 1):.1f} points left per week")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from common import (BASE_DIR, MASTER_MATCHUPS_CSV, load_info, save_output,
+                    scoring_format, slot_labels, starting_slots)
+
+sys.path.insert(0, os.path.join(BASE_DIR, "4. cleaning_processing", "matchups"))
+from matchup_stream import read_batches
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+# inverse regularization strength for the win model; the features don't decide the label, so the
+# fit has a finite optimum and this is large enough to leave it unpenalized in practice
+WIN_MODEL_C = 1e4
+
+
+# ─── FEATURES ───────────────────────────────────────────────────────────────
+def slot_templates(info):
+    """league_id -> labelled starting slots (QB, RB1, RB2, WR1, ..., FLEX, TE)."""
+    return {
+        lid: tuple(slot_labels(starting_slots(rp)))
+        for lid, rp in zip(info["league_id"], info["roster_positions"])
+    }
+
+
+def opponent_index(matchups):
+    """Row position of each roster's opponent in the same league/week/matchup, -1 if none.
+
+    Rows without a matchup_id (byes, consolation weeks) never get an opponent.
+    """
+    opp = np.full(len(matchups), -1)
+    has_matchup = np.flatnonzero(matchups["matchup_id"].notna().to_numpy())
+    if not len(has_matchup):
+        return opp
+    keys = matchups.iloc[has_matchup][["league_id", "week", "matchup_id"]].astype(str).agg("|".join, axis=1)
+    codes = pd.factorize(keys)[0]
+    # matchups rows ordered by their matchup key
+    order = has_matchup[np.argsort(codes, kind="stable")]
+    sorted_codes = np.sort(codes, kind="stable")
+    # pairs sit next to each other once sorted; only keep groups of exactly two
+    first = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sizes = np.diff(np.r_[first, len(sorted_codes)])
+    pairs = first[sizes == 2]
+    opp[order[pairs]] = order[pairs + 1]
+    opp[order[pairs + 1]] = order[pairs]
+    return opp
+
+
+def slot_point_matrix(matchups, starters_points, templates):
+    """Stack starters_points into an (rows x slots) matrix over the union of slot labels.
+
+    starters_points is the flat (values, lengths) pair read_batches yields.
+    Rows are filled one roster template at a time, so there is no per-row loop.
+    Slots a league doesn't have stay 0 and are flagged False in the mask.
+    """
+    slots = []
+    for labels in templates.values():
+        slots += [s for s in labels if s not in slots]
+    col = {s: j for j, s in enumerate(slots)}
+
+    points = np.zeros((len(matchups), len(slots)))
+    has_slot = np.zeros((len(matchups), len(slots)), dtype=bool)
+    template = matchups["league_id"].map(templates)
+    values, lengths = starters_points
+    offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+
+    for labels, idx in template.dropna().groupby(template.dropna()).groups.items():
+        rows = matchups.index.get_indexer(idx)
+        rows = rows[lengths[rows] == len(labels)]
+        if not len(rows):
+            continue
+        cols = [col[s] for s in labels]
+        block = values[offsets[rows][:, None] + np.arange(len(labels))]
+        points[np.ix_(rows, cols)] = np.nan_to_num(block)
+        has_slot[np.ix_(rows, cols)] = True
+    return points, has_slot, slots
+
+
+def build_slot_features(matchups, starters_points, info):
+    """Each roster's slot points against the league-week field, and the win label.
+
+    A feature is the roster's points at a slot minus the mean at that slot over
+    every roster of the league that week, so it says how good the slot was
+    without looking at the opponent. Opponent differentials would sum to the
+    margin and decide every game; leaving the opponent's lineup out of the
+    features keeps the label from being a function of them. Both sides of a
+    game must have a complete lineup of the same template.
+    """
+    matchups = matchups.reset_index(drop=True)
+    templates = slot_templates(info)
+    points, has_slot, slots = slot_point_matrix(matchups, starters_points, templates)
+    opp = opponent_index(matchups)
+
+    # league-week mean at each slot, over the rosters that have it
+    week = pd.factorize(matchups["league_id"].astype(str) + "|" + matchups["week"].astype(str))[0]
+    sums = np.zeros((week.max(initial=-1) + 1, len(slots)))
+    counts = np.zeros_like(sums)
+    np.add.at(sums, week, np.where(has_slot, points, 0.0))
+    np.add.at(counts, week, has_slot)
+    field = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+    keep = (opp >= 0) & has_slot.any(axis=1)
+    keep &= (has_slot == has_slot[opp]).all(axis=1)
+    keep &= matchups["points"].to_numpy() != matchups["points"].to_numpy()[opp]
+    rows, opp = np.flatnonzero(keep), opp[keep]
+
+    X = np.where(has_slot[rows], points[rows] - field[week[rows]], 0.0)
+    y = (matchups["points"].to_numpy()[rows] > matchups["points"].to_numpy()[opp]).astype(int)
+    meta = matchups.loc[rows, ["league_id", "week", "roster_id"]].reset_index(drop=True)
+    return X, y, has_slot[rows], slots, meta
+
+
+# ─── MODEL & SHAP ───────────────────────────────────────────────────────────
+def fit_win_model(X, y, C=WIN_MODEL_C):
+    model = LogisticRegression(C=C, fit_intercept=False, max_iter=1000)
+    model.fit(X, y)
+    return model
+
+
+def linear_shap(X, coef, background=None):
+    """Exact SHAP values (log-odds) for a linear/logistic model, all rows at once.
+
+    For f(x) = b + w·x with independent features, phi_ij = w_j * (x_ij - E[x_j]).
+    """
+    coef = np.ravel(coef)
+    mean = np.asarray(X).mean(axis=0) if background is None else np.asarray(background).mean(axis=0)
+    return (np.asarray(X) - mean) * coef
+
+
+def win_prob_effects(model, X, has_slot):
+    """Average marginal effect on win probability of one more point, and of one sd, at each slot.
+
+    dP/dx_j = p(1 - p) w_j, averaged over the rosters that have the slot; on
+    the probability scale and unpenalized, so it doesn't move with C.
+    """
+    p = model.predict_proba(X)[:, 1]
+    slope = np.where(has_slot, (p * (1 - p))[:, None], np.nan)
+    per_point = np.nanmean(slope, axis=0) * np.ravel(model.coef_)
+    sd = np.nanstd(np.where(has_slot, X, np.nan), axis=0)
+    return per_point, per_point * sd
+
+
+def slot_importance(shap_values, has_slot, slots, formats=None, effects=None):
+    """Mean |SHAP| by slot overall and by league format.
+
+    Only rosters whose template actually has the slot count towards its mean.
+    effects, win_prob_effects' (per point, per sd), is reported alongside.
+    """
+    abs_shap = np.where(has_slot, np.abs(shap_values), np.nan)
+    per_point, per_sd = effects if effects is not None else (np.nan, np.nan)
+    overall = pd.DataFrame({
+        "slot": slots,
+        "win_prob_per_point": per_point,
+        "win_prob_per_sd": per_sd,
+        "mean_abs_shap": np.nanmean(abs_shap, axis=0),
+        "n": has_slot.sum(axis=0),
+    }).sort_values("win_prob_per_sd", ascending=False)
+
+    if formats is None:
+        return overall, None
+    by_format = (
+        pd.DataFrame(abs_shap, columns=slots)
+          .assign(format=np.asarray(formats))
+          .groupby("format")
+          .mean()
+          .rename_axis("format")
+          .reset_index()
+          .melt(id_vars="format", var_name="slot", value_name="mean_abs_shap")
+          .dropna()
+          .sort_values(["format", "mean_abs_shap"], ascending=[True, False])
+    )
+    return overall, by_format
+
+
+# ─── MAIN ───────────────────────────────────────────────────────────────────
+def main():
+    info = load_info()
+    frames, values, lengths = [], [], []
+    for frame, lists in read_batches(MASTER_MATCHUPS_CSV, list_cols=("starters_points",)):
+        frames.append(frame)
+        values.append(lists["starters_points"][0])
+        lengths.append(lists["starters_points"][1])
+    matchups = pd.concat(frames, ignore_index=True)
+    X, y, has_slot, slots, meta = build_slot_features(
+        matchups, (np.concatenate(values), np.concatenate(lengths)), info)
+    print(f"Fitting win model on {len(y)} roster-weeks over {len(slots)} slots")
+
+    model = fit_win_model(X, y)
+    shap_values = linear_shap(X, model.coef_)
+    formats = meta["league_id"].map(scoring_format(info))
+    overall, by_format = slot_importance(shap_values, has_slot, slots, formats,
+                                         win_prob_effects(model, X, has_slot))
+
+    print("Win-probability effect by roster slot:")
+    print(overall.to_string(index=False))
+    save_output(overall, "slot_importance.csv")
+    save_output(by_format, "slot_importance_by_format.csv")
+
+
+if __name__ == "__main__":
+    main()
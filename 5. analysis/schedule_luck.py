@@ -0,0 +1,156 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+from common import BASE_DIR, MASTER_MATCHUPS_CSV, save_output
+from profiling import add_rows, section
+
+sys.path.insert(0, os.path.join(BASE_DIR, "4. cleaning_processing", "matchups"))
+from matchup_stream import CHUNK_ROWS, read_batches
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+N_SIMS = 1000
+N_JOBS = os.cpu_count() or 1
+SEED = 0
+# leagues of one (weeks, teams) shape simulated together per task
+LEAGUES_PER_TASK = 64
+# simulations drawn at once; memory per task ~ SIM_BLOCK x leagues x weeks x teams x 8 bytes
+SIM_BLOCK = 250
+PERCENTILES = [5, 50, 95]
+
+
+# ─── SEASONS ────────────────────────────────────────────────────────────────
+def league_seasons(frame):
+    """Yield (league_id, roster_ids, scores, wins) per league, scores / wins as (weeks x teams).
+
+    Only regular-season weeks are kept: every roster of the league has a
+    head-to-head matchup. Ties count half a win.
+    """
+    f = frame.dropna(subset=["matchup_id", "points"])
+    g = f.groupby(["league_id", "week", "matchup_id"])["points"]
+    size, hi, lo = g.transform("size"), g.transform("max"), g.transform("min")
+    f = f.assign(win=np.where(hi == lo, 0.5, (f["points"] == hi).astype(float)))[size == 2]
+    teams = f.groupby("league_id")["roster_id"].transform("nunique")
+    f = f[f.groupby(["league_id", "week"])["roster_id"].transform("size") == teams]
+    f = f.sort_values(["league_id", "week", "roster_id"])
+    for lid, grp in f.groupby("league_id", sort=False):
+        rosters = np.unique(grp["roster_id"].to_numpy())
+        if len(grp) % len(rosters):
+            continue
+        shape = (len(grp) // len(rosters), len(rosters))
+        yield lid, rosters, grp["points"].to_numpy().reshape(shape), grp["win"].to_numpy().reshape(shape)
+
+
+# ─── ALL-PLAY ───────────────────────────────────────────────────────────────
+def all_play(scores):
+    """All-play wins per team of (leagues x weeks x teams) scores: teams outscored each week, ties half.
+
+    A team's week rank (average on ties) minus one is exactly its all-play wins,
+    and all-play wins / (teams - 1) its expected wins against a random opponent.
+    """
+    return (rankdata(scores, axis=-1) - 1).sum(axis=1)
+
+
+# ─── SIMULATION ─────────────────────────────────────────────────────────────
+def simulate_wins(scores, n_sims, rng):
+    """Season wins under n_sims random schedules: (sims x leagues x teams).
+
+    Every week of every simulation pairs the teams by a fresh random permutation
+    (positions 0-1, 2-3, ...); with an odd team count the last one has a bye.
+    """
+    L, W, T = scores.shape
+    wins = np.empty((n_sims, L, T))
+    for lo in range(0, n_sims, SIM_BLOCK):
+        n = min(SIM_BLOCK, n_sims - lo)
+        perm = rng.permuted(np.broadcast_to(np.arange(T), (n, L, W, T)), axis=-1)
+        opp = np.broadcast_to(np.arange(T), perm.shape).copy()
+        pairs = T - T % 2
+        np.put_along_axis(opp, perm[..., 0:pairs:2], perm[..., 1:pairs:2], axis=-1)
+        np.put_along_axis(opp, perm[..., 1:pairs:2], perm[..., 0:pairs:2], axis=-1)
+        own = np.broadcast_to(scores, perm.shape)
+        other = np.take_along_axis(own, opp, axis=-1)
+        week = (own > other) + 0.5 * (own == other)
+        if T % 2:
+            week[opp == np.arange(T)] = 0
+        wins[lo:lo + n] = week.sum(axis=2)
+    return wins
+
+
+def _run_chunk(args):
+    scores, actual, n_sims, seed = args
+    T = scores.shape[2]
+    ap = all_play(scores)
+    sims = simulate_wins(scores, n_sims, np.random.default_rng(seed))
+    wins = actual.sum(axis=1)
+    out = {
+        "weeks":            np.full(ap.shape, scores.shape[1]),
+        "points_for":       scores.sum(axis=1),
+        "wins":             wins,
+        "all_play_wins":    ap,
+        "all_play_losses":  (T - 1) * scores.shape[1] - ap,
+        # with an odd team count a team plays (T - 1) / T of its weeks
+        "expected_wins":    ap / max(T - 1, 1) * (T - T % 2) / T,
+        "sim_mean_wins":    sims.mean(axis=0),
+        # share of schedules that give fewer wins than the real one (ties half)
+        "luck_percentile":  (sims < wins).mean(axis=0) + 0.5 * (sims == wins).mean(axis=0),
+    }
+    for q, v in zip(PERCENTILES, np.percentile(sims, PERCENTILES, axis=0)):
+        out[f"sim_wins_p{q:02d}"] = v
+    return out
+
+
+def schedule_luck(path=MASTER_MATCHUPS_CSV, n_sims=N_SIMS, n_jobs=N_JOBS, seed=SEED, chunksize=CHUNK_ROWS):
+    """Per-team all-play record, expected wins and schedule-luck percentile for every league."""
+    shapes = {}
+    for frame, _ in read_batches(path, chunksize, list_cols=()):
+        with section("reshape"):
+            for lid, rosters, scores, wins in league_seasons(frame):
+                shapes.setdefault(scores.shape, []).append((lid, rosters, scores, wins))
+        add_rows(len(frame))
+
+    tasks, meta = [], []
+    for shape, leagues in shapes.items():
+        for lo in range(0, len(leagues), LEAGUES_PER_TASK):
+            group = leagues[lo:lo + LEAGUES_PER_TASK]
+            tasks.append((np.stack([g[2] for g in group]), np.stack([g[3] for g in group]), n_sims))
+            meta.append(group)
+    # one seed stream per task, so results don't depend on how tasks land on workers
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    tasks = [t + (s,) for t, s in zip(tasks, seeds)]
+
+    with section("simulate"):
+        if n_jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+                parts = list(ex.map(_run_chunk, tasks, chunksize=max(len(tasks) // (4 * n_jobs), 1)))
+        else:
+            parts = [_run_chunk(t) for t in tasks]
+
+    frames = []
+    for group, part in zip(meta, parts):
+        ids = pd.DataFrame({
+            "league_id": np.repeat([g[0] for g in group], [len(g[1]) for g in group]),
+            "roster_id": np.concatenate([g[1] for g in group]),
+        })
+        frames.append(ids.assign(**{k: v.ravel() for k, v in part.items()}))
+    if not frames:
+        return pd.DataFrame(columns=["league_id", "roster_id", "wins", "expected_wins", "luck"])
+    teams = pd.concat(frames, ignore_index=True)
+    teams["all_play_pct"] = teams["all_play_wins"] / (teams["all_play_wins"] + teams["all_play_losses"])
+    teams["luck"] = teams["wins"] - teams["expected_wins"]
+    return teams.sort_values(["league_id", "roster_id"]).round(4).reset_index(drop=True)
+
+
+def main():
+    teams = schedule_luck()
+    save_output(teams, "schedule_luck.csv")
+    if len(teams):
+        print(f"{teams['league_id'].nunique()} leagues, {N_SIMS} schedules each; "
+              f"luckiest team +{teams['luck'].max():.1f} wins, unluckiest {teams['luck'].min():.1f}")
+
+
+if __name__ == "__main__":
+    main()
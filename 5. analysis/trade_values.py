@@ -0,0 +1,269 @@
+import datetime as dt
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from common import (BASE_DIR, MASTER_MATCHUPS_CSV, OUTPUT_DIR, RAW_DATA_DIR, load_drafts, load_info,
+                    save_output)
+from league_formats import classify_formats
+
+sys.path.insert(0, os.path.join(BASE_DIR, "4. cleaning_processing", "matchups"))
+from matchup_stream import CHUNK_ROWS, read_batches
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+# drop FantasyCalc-style exports here: player_id, date, value, format (one row per snapshot)
+VALUES_DIR = os.path.join(RAW_DATA_DIR, "values")
+VALUE_STORE_NPZ = os.path.join(RAW_DATA_DIR, "value_store.npz")
+PLAYER_WEEK_VALUES_CSV = os.path.join(OUTPUT_DIR, "player_week_values.csv")
+
+# snapshot formats are "|"-joined facet values in this order, most specific first;
+# a league falls back to shorter prefixes and finally to "any"
+VALUE_FACETS = ["league_type", "qb", "scoring"]
+ANY_FORMAT = "any"
+
+# used when a league has no season / a draft has no start_time
+SEASON = 2024
+DRAFT_DAY = (8, 25)
+# ignore snapshots older than this at lookup time
+MAX_AGE_DAYS = 60
+
+DAY_BITS = 20  # days since 1970 fit in 20 bits until the year 4840
+
+
+# ─── STORE ──────────────────────────────────────────────────────────────────
+class ValueStore:
+    """Date-sorted columnar store of (format, player, day) -> value snapshots.
+
+    Rows are sorted by one int64 key, (format * n_players + player) << DAY_BITS | day,
+    so an as-of lookup for any number of rows is a single searchsorted: the
+    latest snapshot at or before the query day sits just left of the query key.
+    """
+
+    def __init__(self, formats, players, fmt, player, day, value):
+        self.formats = np.asarray(formats, dtype=object)
+        self.players = np.asarray(players, dtype=object)
+        self.fmt = np.asarray(fmt, dtype=np.int32)
+        self.player = np.asarray(player, dtype=np.int32)
+        self.day = np.asarray(day, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.keys = self._key(self.fmt, self.player, self.day)
+
+    def __len__(self):
+        return len(self.value)
+
+    def _key(self, fmt, player, day):
+        group = fmt.astype(np.int64) * len(self.players) + player
+        return (group << DAY_BITS) | day.astype(np.int64)
+
+    @classmethod
+    def from_frame(cls, snapshots):
+        """Build from a (player_id, date, value, format) frame; the last copy of a duplicate wins."""
+        df = snapshots.dropna(subset=["player_id", "date", "value"]).drop_duplicates(
+            ["format", "player_id", "date"], keep="last")
+        fmt, formats = pd.factorize(df["format"], sort=True)
+        player, players = pd.factorize(df["player_id"], sort=True)
+        day = df["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+        store = cls(formats, players, fmt, player, day, df["value"].to_numpy())
+        order = np.argsort(store.keys, kind="stable")
+        return cls(formats, players, fmt[order], player[order], day[order], store.value[order])
+
+    def table(self):
+        return pd.DataFrame({
+            "player_id": self.players[self.player],
+            "date":      self.day.astype("datetime64[D]"),
+            "value":     self.value,
+            "format":    self.formats[self.fmt],
+        })
+
+    def update(self, snapshots):
+        """Fold newer snapshot rows into the store."""
+        return ValueStore.from_frame(pd.concat([self.table(), normalize(snapshots)], ignore_index=True))
+
+    def asof(self, player_ids, formats, dates, max_age_days=MAX_AGE_DAYS):
+        """Latest value at or before each date, per (player_id, format); NaN when none is recent enough.
+
+        Returns (value, snapshot_date) arrays aligned with the inputs.
+        """
+        n = len(player_ids)
+        out = np.full(n, np.nan)
+        out_day = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+        player = pd.Index(self.players).get_indexer(np.asarray(player_ids, dtype=object))
+        fmt = pd.Index(self.formats).get_indexer(np.asarray(formats, dtype=object))
+        day = np.asarray(dates, dtype="datetime64[D]")
+        known = (player >= 0) & (fmt >= 0) & ~np.isnat(day)
+        if not known.any() or not len(self):
+            return out, out_day
+
+        q_day = day[known].astype(np.int64)
+        q_key = self._key(fmt[known], player[known], q_day)
+        idx = np.searchsorted(self.keys, q_key, side="right") - 1
+        hit = idx >= 0
+        # the row to the left must belong to the same (format, player) group
+        hit[hit] = (self.keys[idx[hit]] >> DAY_BITS) == (q_key[hit] >> DAY_BITS)
+        if max_age_days is not None:
+            hit[hit] = q_day[hit] - self.day[idx[hit]] <= max_age_days
+
+        rows = np.flatnonzero(known)[hit]
+        out[rows] = self.value[idx[hit]]
+        out_day[rows] = self.day[idx[hit]].astype("datetime64[D]")
+        return out, out_day
+
+    def save(self, path=VALUE_STORE_NPZ):
+        np.savez_compressed(path, formats=self.formats.astype(str), players=self.players.astype(str),
+                            fmt=self.fmt, player=self.player, day=self.day, value=self.value)
+        return path
+
+    @classmethod
+    def load(cls, path=VALUE_STORE_NPZ):
+        with np.load(path) as z:
+            return cls(z["formats"].astype(object), z["players"].astype(object),
+                       z["fmt"], z["player"], z["day"], z["value"])
+
+
+# ─── INGESTION ──────────────────────────────────────────────────────────────
+def normalize(snapshots):
+    """player_id as str, date as a day, format lower-cased ("any" when missing)."""
+    df = snapshots.copy()
+    df["player_id"] = df["player_id"].astype(str).str.replace(r"\.0$", "", regex=True)
+    df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.normalize()
+    df["value"] = pd.to_numeric(df["value"], errors="coerce")
+    fmt = df["format"] if "format" in df else pd.Series(ANY_FORMAT, index=df.index)
+    df["format"] = fmt.fillna(ANY_FORMAT).astype(str).str.strip().str.lower()
+    return df[["player_id", "date", "value", "format"]]
+
+
+def read_snapshots(values_dir=VALUES_DIR):
+    paths = sorted(glob.glob(os.path.join(values_dir, "*.csv")))
+    if not paths:
+        return pd.DataFrame(columns=["player_id", "date", "value", "format"])
+    # later files win on duplicate (format, player, date)
+    return normalize(pd.concat([pd.read_csv(p, dtype={"player_id": str}) for p in paths],
+                               ignore_index=True))
+
+
+def ingest(values_dir=VALUES_DIR, store_path=VALUE_STORE_NPZ):
+    """Rebuild the store from every snapshot file and save it."""
+    store = ValueStore.from_frame(read_snapshots(values_dir))
+    store.save(store_path)
+    print(f"Value store: {len(store)} snapshots, {len(store.players)} players, "
+          f"formats {list(store.formats)} → {store_path}")
+    return store
+
+
+# ─── DATES & FORMATS ────────────────────────────────────────────────────────
+def league_seasons(info):
+    seasons = info["season"] if "season" in info else pd.Series(SEASON, index=info.index)
+    seasons = pd.Series(seasons.fillna(SEASON).astype(int).to_numpy(), index=info["league_id"].to_numpy())
+    return seasons[~seasons.index.duplicated()]
+
+
+def season_kickoff(season):
+    """Thursday after Labor Day (first Monday in September)."""
+    sept1 = dt.date(season, 9, 1)
+    labor_day = sept1 + dt.timedelta(days=(7 - sept1.weekday()) % 7)
+    return np.datetime64(labor_day + dt.timedelta(days=3), "D")
+
+
+def week_dates(seasons, weeks):
+    """Kickoff day of each (season, week)."""
+    seasons = np.asarray(seasons, dtype=int)
+    kickoffs = {s: season_kickoff(s) for s in np.unique(seasons)}
+    start = np.array([kickoffs[s] for s in seasons], dtype="datetime64[D]")
+    return start + (np.asarray(weeks, dtype=int) - 1) * np.timedelta64(7, "D")
+
+
+def draft_dates(drafts, seasons):
+    """Draft day from start_time (epoch ms) when the crawl kept it, else DRAFT_DAY of the season."""
+    fallback = np.array([np.datetime64(dt.date(int(s), *DRAFT_DAY), "D")
+                         for s in drafts["league_id"].map(seasons).fillna(SEASON)], dtype="datetime64[D]")
+    if "draft_time" not in drafts:
+        return fallback
+    stamped = pd.to_datetime(pd.to_numeric(drafts["draft_time"], errors="coerce"), unit="ms")
+    return np.where(stamped.isna(), fallback, stamped.to_numpy(dtype="datetime64[D]"))
+
+
+def value_formats(info):
+    """league_id -> candidate snapshot formats, most specific first."""
+    facets = classify_formats(info).drop_duplicates("league_id")
+    return {
+        row[0]: ["|".join(row[1:n + 1]) for n in range(len(VALUE_FACETS), 0, -1)] + [ANY_FORMAT]
+        for row in facets[["league_id"] + VALUE_FACETS].itertuples(index=False)
+    }
+
+
+def attach_values(frame, store, dates, candidates, prefix="value"):
+    """Add <prefix>, <prefix>_date and <prefix>_format columns via as-of lookups.
+
+    Each row tries its league's candidate formats in order; one vectorized
+    asof() call per fallback level, only over rows still missing a value.
+    """
+    n = len(frame)
+    value = np.full(n, np.nan)
+    when = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+    fmt_used = np.full(n, None, dtype=object)
+    levels = max((len(c) for c in candidates.values()), default=0)
+    for level in range(levels):
+        level_fmt = frame["league_id"].map({k: c[min(level, len(c) - 1)] for k, c in candidates.items()})
+        todo = np.flatnonzero(np.isnan(value) & level_fmt.notna().to_numpy())
+        if not len(todo):
+            break
+        fmts = level_fmt.to_numpy(dtype=object)[todo]
+        v, d = store.asof(frame["player_id"].to_numpy()[todo], fmts, dates[todo])
+        got = ~np.isnan(v)
+        value[todo[got]], when[todo[got]], fmt_used[todo[got]] = v[got], d[got], fmts[got]
+    return frame.assign(**{prefix: value, f"{prefix}_date": when, f"{prefix}_format": fmt_used})
+
+
+# ─── JOINS ──────────────────────────────────────────────────────────────────
+def draft_values(store, drafts, info):
+    """Every pick with the player's value on draft day."""
+    dates = draft_dates(drafts, league_seasons(info))
+    return attach_values(drafts, store, dates, value_formats(info), prefix="value_at_draft")
+
+
+def player_week_values(store, info, path=MASTER_MATCHUPS_CSV, out_path=PLAYER_WEEK_VALUES_CSV,
+                       chunksize=CHUNK_ROWS):
+    """Stream every rostered player-week (from players_points) with its value at kickoff to csv."""
+    seasons, candidates = league_seasons(info), value_formats(info)
+    rows = 0
+    for i, (frame, lists) in enumerate(read_batches(path, chunksize, list_cols=("players_points",))):
+        ids, pts, lengths = lists["players_points"]
+        rep = np.repeat(np.arange(len(frame)), lengths)
+        weeks = frame.iloc[rep][["league_id", "week", "roster_id"]].reset_index(drop=True)
+        weeks["player_id"], weeks["points"] = ids, pts
+        season = weeks["league_id"].map(seasons)
+        if "season" in frame:
+            season = pd.Series(frame["season"].to_numpy()[rep]).fillna(season)
+        dates = week_dates(season.fillna(SEASON), weeks["week"])
+        out = attach_values(weeks, store, dates, candidates, prefix="value_at_week")
+        out.to_csv(out_path, index=False, mode="w" if i == 0 else "a", header=i == 0)
+        rows += len(out)
+    return rows
+
+
+def main():
+    store = ingest()
+    if not len(store):
+        print(f"No value snapshots in {VALUES_DIR}; add csvs with player_id, date, value, format")
+        # header only, so the stage's declared output exists and it counts as up to date
+        save_output(pd.DataFrame(columns=["league_id", "pick_no", "player_id", "value_at_draft",
+                                          "value_at_draft_date", "value_at_draft_format"]),
+                    "draft_values.csv")
+        return
+
+    info = load_info()
+    picks = draft_values(store, load_drafts(), info)
+    save_output(picks, "draft_values.csv")
+    print(f"value_at_draft found for {picks['value_at_draft'].notna().mean():.1%} of picks")
+
+    if os.path.exists(MASTER_MATCHUPS_CSV):
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        rows = player_week_values(store, info)
+        print(f"Wrote {rows} player-weeks to {PLAYER_WEEK_VALUES_CSV}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Memory-mapped cache for intermediate arrays, sparse matrices and tables.
+
+An artifact is a bundle (dict) of numpy arrays, scipy sparse matrices and
+DataFrames, keyed by the content hash of its input files plus a params dict.
+Each part is written as plain .npy files (CSR as data/indices/indptr, tables
+column by column), so a hit is np.load(mmap_mode="r"): no parsing, no copy,
+and parallel workers reading the same entry share one page-cache copy.
+
+    from artifact_cache import cached
+    art = cached("rapm_inputs", build, inputs=[MASTER_MATCHUPS_CSV, __file__])
+
+Entries live in .sleeper_ff/cache/<name>-<key>/; the least recently used are
+evicted once the cache exceeds SLEEPER_FF_CACHE_MB (default 4096).
+SLEEPER_FF_CACHE=0 turns it off (build() runs every time). Cached arrays are
+read-only; copy before writing into them.
+
+    python artifact_cache.py            # list entries
+    python artifact_cache.py --clear
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from digests import file_digest
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR   = os.path.join(BASE_DIR, ".sleeper_ff", "cache")
+MANIFEST    = "manifest.json"
+ENABLED     = os.environ.get("SLEEPER_FF_CACHE", "1") != "0"
+MAX_BYTES   = int(float(os.environ.get("SLEEPER_FF_CACHE_MB", 4096)) * 2**20)
+
+
+def _safe(part):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in str(part))
+
+
+# ─── PARTS ──────────────────────────────────────────────────────────────────
+# every writer returns the manifest entry its reader needs
+def _write_array(path, a):
+    a = np.asarray(a)
+    if a.dtype == object:
+        # strings / ids: fixed-width unicode keeps them mappable
+        a = a.astype(str)
+    np.save(path + ".npy", a, allow_pickle=False)
+    return {"kind": "array"}
+
+
+def _read_array(path, meta):
+    return np.load(path + ".npy", mmap_mode="r")
+
+
+def _write_sparse(path, m):
+    m = m.tocsr()
+    for f in ("data", "indices", "indptr"):
+        np.save(f"{path}.{f}.npy", getattr(m, f))
+    return {"kind": "csr", "shape": list(m.shape)}
+
+
+def _read_sparse(path, meta):
+    data, indices, indptr = (np.load(f"{path}.{f}.npy", mmap_mode="r") for f in ("data", "indices", "indptr"))
+    # the constructor keeps matching-dtype buffers as they are, so X stays backed by the maps
+    return sparse.csr_matrix((data, indices, indptr), shape=tuple(meta["shape"]), copy=False)
+
+
+def _write_column(path, s):
+    dtype = s.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or dtype == object or pd.api.types.is_string_dtype(dtype):
+        cat = s.astype("category")
+        np.save(path + ".codes.npy", cat.cat.codes.to_numpy())
+        _write_array(path + ".categories", cat.cat.categories.to_numpy())
+        return {"kind": "category"}
+    if pd.api.types.is_extension_array_dtype(dtype) and hasattr(dtype, "numpy_dtype"):
+        # nullable Int / Float / boolean: values + mask, both mappable
+        np.save(path + ".values.npy", s.to_numpy(dtype=dtype.numpy_dtype, na_value=0))
+        np.save(path + ".mask.npy", s.isna().to_numpy())
+        return {"kind": "masked", "dtype": str(dtype)}
+    np.save(path + ".npy", s.to_numpy(), allow_pickle=False)
+    return {"kind": "array"}
+
+
+def _read_column(path, meta):
+    if meta["kind"] == "category":
+        codes = np.load(path + ".codes.npy", mmap_mode="r")
+        categories = np.load(path + ".categories.npy", mmap_mode="r")
+        return pd.Categorical.from_codes(codes, categories=pd.Index(categories), validate=False)
+    if meta["kind"] == "masked":
+        values = np.load(path + ".values.npy", mmap_mode="r")
+        mask = np.load(path + ".mask.npy", mmap_mode="r")
+        return pd.api.types.pandas_dtype(meta["dtype"]).construct_array_type()(values, mask)
+    return np.load(path + ".npy", mmap_mode="r")
+
+
+def _write_frame(path, df):
+    cols = [{"name": str(c), **_write_column(f"{path}.c{i}", df[c])} for i, c in enumerate(df.columns)]
+    return {"kind": "frame", "columns": cols, "rows": len(df)}
+
+
+def _read_frame(path, meta):
+    data = {c["name"]: _read_column(f"{path}.c{i}", c) for i, c in enumerate(meta["columns"])}
+    return pd.DataFrame(data, copy=False)
+
+
+def _write_part(path, obj):
+    if sparse.issparse(obj):
+        return _write_sparse(path, obj)
+    if isinstance(obj, pd.DataFrame):
+        return _write_frame(path, obj)
+    if isinstance(obj, (np.ndarray, pd.Index, pd.Series, list, tuple)):
+        return _write_array(path, obj)
+    # small scalars / dicts ride along in the manifest
+    return {"kind": "json", "value": obj}
+
+
+READERS = {"array": _read_array, "csr": _read_sparse, "frame": _read_frame,
+           "json": lambda path, meta: meta["value"]}
+
+
+# ─── CACHE ──────────────────────────────────────────────────────────────────
+class ArtifactCache:
+    """Content-keyed, size-capped, LRU store of memory-mapped artifact bundles."""
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES, enabled=ENABLED):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = self.misses = 0
+
+    # ─── KEYS ───────────────────────────────────────────────────────────────
+    def key(self, inputs=(), params=None):
+        """sha256 over the input files' contents (memoised on size + mtime) and params."""
+        digests = self._load_digests()
+        parts = {"params": params or {}}
+        for path in inputs:
+            parts[os.path.relpath(os.path.abspath(path), BASE_DIR)] = file_digest(os.path.abspath(path), digests)
+        self._save_digests(digests)
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+    def _load_digests(self):
+        try:
+            with open(os.path.join(self.root, "digests.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_digests(self, digests):
+        path = os.path.join(self.root, "digests.json")
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(digests, f)
+        os.replace(tmp, path)
+
+    def path(self, name, key):
+        return os.path.join(self.root, f"{_safe(name)}-{key}")
+
+    # ─── GET / PUT ──────────────────────────────────────────────────────────
+    def get(self, name, key):
+        """The bundle mapped from disk, or None on a miss."""
+        entry = self.path(name, key)
+        try:
+            with open(os.path.join(entry, MANIFEST)) as f:
+                manifest = json.load(f)
+            bundle = {part: READERS[meta["kind"]](os.path.join(entry, _safe(part)), meta)
+                      for part, meta in manifest["parts"].items()}
+        except (OSError, ValueError, KeyError):
+            return None
+        # mtime of the manifest is the LRU clock
+        os.utime(os.path.join(entry, MANIFEST))
+        return bundle
+
+    def put(self, name, key, bundle, meta=None):
+        """Write a bundle and return it mapped back from disk."""
+        entry = self.path(name, key)
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        parts = {part: _write_part(os.path.join(tmp, _safe(part)), obj) for part, obj in bundle.items()}
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+        with open(os.path.join(tmp, MANIFEST), "w") as f:
+            json.dump({"name": name, "key": key, "bytes": size, "created": time.time(),
+                       "meta": meta or {}, "parts": parts}, f, indent=1, default=str)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # another worker published the same key first; theirs is identical
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=entry)
+        return self.get(name, key)
+
+    def cached(self, name, build, inputs=(), params=None):
+        """get() or build() + put(). build returns a dict of parts."""
+        if not self.enabled:
+            return build()
+        key = self.key(inputs, params)
+        bundle = self.get(name, key)
+        if bundle is not None:
+            self.hits += 1
+            return bundle
+        self.misses += 1
+        return self.put(name, key, build(), meta={"inputs": [str(p) for p in inputs], "params": params})
+
+    # ─── LRU ────────────────────────────────────────────────────────────────
+    def entries(self):
+        """(path, bytes, last_used, manifest) per entry, least recently used first."""
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for d in os.listdir(self.root):
+            man = os.path.join(self.root, d, MANIFEST)
+            if d.endswith(".tmp") or not os.path.exists(man):
+                continue
+            with open(man) as f:
+                manifest = json.load(f)
+            out.append((os.path.join(self.root, d), manifest["bytes"], os.path.getmtime(man), manifest))
+        return sorted(out, key=lambda e: e[2])
+
+    def evict(self, keep=None):
+        """Drop least recently used entries until the cache fits max_bytes.
+
+        Processes that already mapped an evicted entry keep reading it; the
+        files go away once the last map is closed.
+        """
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        for path, size, _, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        return total
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+cache = ArtifactCache()
+cached = cache.cached
+
+
+# ─── MAIN ────────────────────────────────────────────────────────────────────
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--clear", action="store_true", help="delete every cached artifact")
+    args = p.parse_args()
+    if args.clear:
+        cache.clear()
+        print(f"cleared {cache.root}")
+        return
+    entries = cache.entries()
+    for path, size, used, manifest in entries[::-1]:
+        print(f"{os.path.basename(path):<44}{size / 2**20:>10.1f} MB  "
+              f"last used {time.strftime('%Y-%m-%d %H:%M', time.localtime(used))}")
+    print(f"{len(entries)} entries, {sum(e[1] for e in entries) / 2**20:.1f} / {cache.max_bytes / 2**20:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Time and memory-profile each stage against synthetic data at several scales.
+
+Each (scale, stage) runs in a fresh process so peak RSS belongs to that stage
+alone. Results are appended to benchmarks/results.jsonl with the git commit,
+and every run is compared against the last run of a different commit.
+
+    python benchmarks/bench.py --scales 1k 10k
+    python benchmarks/bench.py --scales 100k --stages draft_ingest matchup_parse
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# ─── PATHS ───────────────────────────────────────────────────────────────────
+BENCH_DIR     = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR      = os.path.dirname(BENCH_DIR)
+DATA_DIR      = os.path.join(BENCH_DIR, "data")
+RESULTS_JSONL = os.path.join(BENCH_DIR, "results.jsonl")
+
+for d in ("1. scripts", "4. cleaning_processing/matchups", "5. analysis"):
+    sys.path.insert(0, os.path.join(BASE_DIR, d))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, BASE_DIR)
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+# flag a stage when it is this much slower / heavier than the previous commit
+REGRESSION_RATIO = 1.2
+
+
+# ─── STAGES ──────────────────────────────────────────────────────────────────
+# each stage is (setup, run): setup is untimed, run returns rows processed
+def setup_id_merge(data_dir):
+    import s2_get_league_info as s2
+    s2.LEAGUE_IDS_DIR = data_dir
+    return s2
+
+
+def run_id_merge(s2):
+    return len(s2.merge_league_ids())
+
+
+def setup_draft_ingest(data_dir):
+    return os.path.join(data_dir, "master_drafts.csv")
+
+
+def run_draft_ingest(path):
+    from common import load_drafts
+    return len(load_drafts(path))
+
+
+def setup_matchup_parse(data_dir):
+    return os.path.join(data_dir, "master_matchups.csv")
+
+
+def run_matchup_parse(path):
+    from common import load_matchups
+    return len(load_matchups(path, list_cols=("starters", "starters_points", "players_points")))
+
+
+def setup_matchup_stream(data_dir):
+    return os.path.join(data_dir, "master_matchups.csv")
+
+
+def run_matchup_stream(path):
+    from matchup_stream import read_batches
+    return sum(len(frame) for frame, _ in
+               read_batches(path, list_cols=("starters", "starters_points", "players_points")))
+
+
+def setup_win_label(data_dir):
+    import pandas as pd
+    return pd.read_csv(os.path.join(data_dir, "master_matchups.csv"),
+                       usecols=["league_id", "week", "roster_id", "matchup_id", "points"])
+
+
+def run_win_label(matchups):
+    from rapm_type import label_wins
+    return len(label_wins(matchups))
+
+
+def setup_rapm_fit(data_dir):
+    from matchup_stream import read_batches, DesignMatrixBuilder
+    design = DesignMatrixBuilder()
+    for frame, lists in read_batches(os.path.join(data_dir, "master_matchups.csv")):
+        design.add(frame, lists)
+    return design.result()
+
+
+def run_rapm_fit(design):
+    from rapm_type import fit_rapm
+    fit_rapm(*design)
+    return design[0].shape[0]
+
+
+def setup_rapm_cached(data_dir):
+    from artifact_cache import ArtifactCache
+    from rapm_type import build_inputs
+    import matchup_stream
+    path = os.path.join(data_dir, "master_matchups.csv")
+    cache = ArtifactCache(root=os.path.join(data_dir, "cache"))
+    key = cache.key([path, matchup_stream.__file__])
+    if cache.get("rapm_inputs", key) is None:
+        cache.put("rapm_inputs", key, build_inputs(path))
+    return cache, key
+
+
+def run_rapm_cached(cached):
+    cache, key = cached
+    art = cache.get("rapm_inputs", key)
+    return art["X"].shape[0]
+
+
+def setup_lineup_opt(data_dir):
+    from common import load_info, player_positions
+    return (load_info(os.path.join(data_dir, "master_info.csv")),
+            player_positions(path=os.path.join(data_dir, "players_sleeper.csv")),
+            os.path.join(data_dir, "master_matchups.csv"), os.path.join(data_dir, "lineup_efficiency.csv"))
+
+
+def run_lineup_opt(args):
+    from lineup_efficiency import lineup_efficiency
+    info, positions, path, out_path = args
+    return int(lineup_efficiency(info, positions, path, out_path)["weeks"].sum())
+
+
+def setup_schedule_luck(data_dir):
+    return os.path.join(data_dir, "master_matchups.csv")
+
+
+def run_schedule_luck(path):
+    from schedule_luck import schedule_luck
+    return len(schedule_luck(path))
+
+
+STAGES = {
+    "id_merge":      (setup_id_merge, run_id_merge),
+    "draft_ingest":  (setup_draft_ingest, run_draft_ingest),
+    "matchup_parse": (setup_matchup_parse, run_matchup_parse),
+    "matchup_stream": (setup_matchup_stream, run_matchup_stream),
+    "win_label":     (setup_win_label, run_win_label),
+    "rapm_fit":      (setup_rapm_fit, run_rapm_fit),
+    "rapm_cached":   (setup_rapm_cached, run_rapm_cached),
+    "lineup_opt":    (setup_lineup_opt, run_lineup_opt),
+    "schedule_luck": (setup_schedule_luck, run_schedule_luck),
+}
+
+
+# ─── WORKER ──────────────────────────────────────────────────────────────────
+def measure(stage, data_dir, trace_alloc=False):
+    """Run one stage in this process and return its timings and memory.
+
+    tracemalloc slows pure-python stages down a lot, so it only runs when asked.
+    """
+    setup, run = STAGES[stage]
+    state = setup(data_dir)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    if trace_alloc:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    rows = run(state)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    py_peak = tracemalloc.get_traced_memory()[1] if trace_alloc else 0
+    tracemalloc.stop()
+
+    return {
+        "seconds":      round(wall, 4),
+        "cpu_seconds":  round(cpu, 4),
+        "rows":         int(rows),
+        "rows_per_sec": round(rows / wall, 1) if wall else None,
+        "peak_rss_mb":  round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "setup_rss_mb": round(rss_before, 1),
+        "py_peak_mb":   round(py_peak / 2**20, 1) if trace_alloc else None,
+    }
+
+
+# ─── RUNNER ──────────────────────────────────────────────────────────────────
+def git_version():
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                      text=True, stderr=subprocess.DEVNULL).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet"], cwd=BASE_DIR) != 0
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def ensure_data(scale):
+    from synthetic import generate
+    data_dir = os.path.join(DATA_DIR, scale)
+    if not os.path.exists(os.path.join(data_dir, "master_matchups.csv")):
+        print(f"Generating {scale} synthetic leagues → {data_dir}")
+        generate(SCALES[scale], data_dir)
+    return data_dir
+
+
+def load_results():
+    if not os.path.exists(RESULTS_JSONL):
+        return []
+    with open(RESULTS_JSONL) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous(results, version, scale, stage):
+    """Latest result for (scale, stage) recorded by another commit."""
+    for r in reversed(results):
+        if r["scale"] == scale and r["stage"] == stage and r["version"] != version:
+            return r
+    return None
+
+
+def compare(result, prev):
+    if prev is None:
+        return ""
+    notes = []
+    for key, label in (("seconds", "time"), ("peak_rss_mb", "rss")):
+        if prev.get(key) and result[key] > prev[key] * REGRESSION_RATIO:
+            notes.append(f"{label} {prev[key]} → {result[key]}")
+    return f"  ⚠ regression vs {prev['version']}: " + ", ".join(notes) if notes else f"  (vs {prev['version']}: ok)"
+
+
+def run_benchmarks(scales, stages, trace_alloc=False):
+    version = git_version()
+    history = load_results()
+    for scale in scales:
+        data_dir = ensure_data(scale)
+        for stage in stages:
+            cmd = [sys.executable, __file__, "--worker", stage, "--data", data_dir]
+            proc = subprocess.run(cmd + (["--trace-alloc"] if trace_alloc else []),
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"✖ {scale:>5} {stage:<14} failed:\n{proc.stderr[-2000:]}")
+                continue
+            result = {"version": version, "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                      "scale": scale, "stage": stage, **json.loads(proc.stdout.strip().splitlines()[-1])}
+            with open(RESULTS_JSONL, "a") as f:
+                f.write(json.dumps(result) + "\n")
+            print(f"✔ {scale:>5} {stage:<14} {result['seconds']:>9.2f}s  "
+                  f"rss {result['peak_rss_mb']:>8.1f}MB  "
+                  + (f"py {result['py_peak_mb']:>8.1f}MB  " if trace_alloc else "")
+                  + f"{result['rows']} rows" + compare(result, previous(history, version, scale, stage)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", default=["1k"], choices=list(SCALES))
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--trace-alloc", action="store_true",
+                        help="also record the tracemalloc peak (slows python-heavy stages)")
+    parser.add_argument("--worker", choices=list(STAGES), help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # stage output goes to stderr so stdout carries only the result line
+        stdout, sys.stdout = sys.stdout, sys.stderr
+        result = measure(args.worker, args.data, args.trace_alloc)
+        sys.stdout = stdout
+        print(json.dumps(result))
+        return
+    run_benchmarks(args.scales, args.stages, args.trace_alloc)
+
+
+if __name__ == "__main__":
+    main()
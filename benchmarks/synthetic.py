@@ -0,0 +1,226 @@
+"""Sleeper-shaped synthetic leagues, drafts and matchups at any scale.
+
+Writes the same files the crawl produces (crawled_leagues*.csv, old_leagues.csv,
+out_of_filter.csv, master_info.csv, master_drafts.csv, master_matchups.csv)
+so every stage can be pointed at them unchanged.
+
+    python benchmarks/synthetic.py --leagues 10000 --out benchmarks/data/10k
+"""
+import argparse
+import ast
+import os
+
+import numpy as np
+import pandas as pd
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+N_PLAYERS = 2000
+WEEKS = list(range(1, 18))
+CHUNK_LEAGUES = 500
+
+POSITION_MIX = {"QB": 0.12, "RB": 0.25, "WR": 0.35, "TE": 0.13, "K": 0.07, "DEF": 0.08}
+# weekly points of an elite starter at each position
+POSITION_CEILING = {"QB": 24, "RB": 20, "WR": 19, "TE": 14, "K": 9, "DEF": 9}
+# drafters rank players by points over the n-th best at their position, roughly the last starter
+REPLACEMENT_RANK = {"QB": 20, "RB": 40, "WR": 50, "TE": 16, "K": 14, "DEF": 14}
+SLOT_ELIGIBILITY = {
+    "QB": {"QB"}, "RB": {"RB"}, "WR": {"WR"}, "TE": {"TE"}, "K": {"K"}, "DEF": {"DEF"},
+    "FLEX": {"RB", "WR", "TE"},
+    "SUPER_FLEX": {"QB", "RB", "WR", "TE"},
+}
+
+STARTERS = [
+    ["QB", "RB", "RB", "WR", "WR", "TE", "FLEX", "FLEX", "FLEX", "SUPER_FLEX"],
+    ["QB", "RB", "RB", "WR", "WR", "WR", "TE", "FLEX", "FLEX", "SUPER_FLEX"],
+    ["QB", "RB", "RB", "WR", "WR", "TE", "FLEX", "FLEX", "SUPER_FLEX"],
+    ["QB", "RB", "RB", "WR", "WR", "TE", "FLEX", "K", "DEF"],
+    ["QB", "RB", "RB", "WR", "WR", "WR", "TE", "FLEX", "FLEX"],
+]
+BENCH = [6, 8, 10, 12]
+
+
+# ─── PLAYERS ────────────────────────────────────────────────────────────────
+def player_universe(rng, n=N_PLAYERS):
+    """Player ids, positions and weekly scoring means; ADP follows value over replacement."""
+    positions = rng.choice(list(POSITION_MIX), size=n, p=list(POSITION_MIX.values()))
+    quality = rng.beta(1.2, 4, size=n)
+    ceiling = np.array([POSITION_CEILING[p] for p in positions])
+    mean_pts = ceiling * (0.25 + quality)
+    players = pd.DataFrame({
+        "player_id": (1000 + np.arange(n)).astype(str),
+        "position":  positions,
+        "mean_pts":  mean_pts,
+    })
+    by_pos = players.groupby("position")["mean_pts"]
+    replacement = by_pos.transform(
+        lambda pts: pts.nlargest(REPLACEMENT_RANK[pts.name]).min() if len(pts) else 0.0)
+    players["adp_rank"] = (players["mean_pts"] - replacement).rank(ascending=False, method="first").to_numpy()
+    return players
+
+
+def draft(rng, players, slot, rounds, slots):
+    """Player index taken at each pick of a snake draft.
+
+    Every drafter reads the same board with their own noise and takes the best
+    player left, unless their remaining picks are only just enough for the
+    dedicated slots still empty; then they take the best player at one of those.
+    """
+    noisy = np.argsort(players["adp_rank"].to_numpy() + rng.normal(0, 25, len(players)))
+    position = players["position"].to_numpy()[noisy]
+    # board positions of each position's players, best first
+    queues = {p: np.flatnonzero(position == p) for p in POSITION_MIX}
+    head = dict.fromkeys(queues, 0)
+    teams = slot.max()
+    dedicated = [s for s in slots if len(SLOT_ELIGIBILITY[s]) == 1]
+    need = [{p: dedicated.count(p) for p in set(dedicated)} for _ in range(teams)]
+    left = np.full(teams, rounds)
+
+    taken = np.empty(len(slot), dtype=np.int64)
+    for k, t in enumerate(slot - 1):
+        open_pos = [p for p in queues if head[p] < len(queues[p])]
+        if left[t] <= sum(need[t].values()):
+            open_pos = [p for p in open_pos if need[t].get(p, 0) > 0] or open_pos
+        p = min(open_pos, key=lambda p: queues[p][head[p]])
+        taken[k] = noisy[queues[p][head[p]]]
+        head[p] += 1
+        if need[t].get(p, 0) > 0:
+            need[t][p] -= 1
+        left[t] -= 1
+    return taken
+
+
+def lineup(slots, positions, mean_pts):
+    """Roster index starting in each slot (-1 when nobody is eligible), chosen on paper.
+
+    Dedicated slots are filled first, then the flex slots from the most
+    restrictive up, each with the best eligible player left.
+    """
+    chosen = np.full(len(slots), -1)
+    free = np.ones(len(positions), dtype=bool)
+    by_value = np.argsort(-mean_pts, kind="stable")
+    for i in sorted(range(len(slots)), key=lambda i: len(SLOT_ELIGIBILITY[slots[i]])):
+        for j in by_value:
+            if free[j] and positions[j] in SLOT_ELIGIBILITY[slots[i]]:
+                chosen[i], free[j] = j, False
+                break
+    return chosen
+
+
+# ─── LEAGUES ────────────────────────────────────────────────────────────────
+def league_table(rng, n):
+    # 19-digit ids like Sleeper's
+    ids = rng.choice(8 * 10**18, size=n, replace=False) + 10**18
+    templates = rng.integers(len(STARTERS), size=n)
+    bench = rng.choice(BENCH, size=n)
+    roster_positions = [str(STARTERS[t] + ["BN"] * b) for t, b in zip(templates, bench)]
+    return pd.DataFrame({
+        "league_id":        ids.astype(str),
+        "rec":              rng.choice([1.0, 0.5, 0.0], size=n, p=[0.7, 0.25, 0.05]),
+        "pass_td":          rng.choice([4.0, 6.0], size=n, p=[0.6, 0.4]),
+        "bonus_rec_te":     rng.choice([0.0, 0.5, 1.0], size=n, p=[0.6, 0.25, 0.15]),
+        "roster_positions": roster_positions,
+        "num_teams":        rng.choice([10, 12], size=n),
+        "type":             rng.choice([0, 1, 2], size=n, p=[0.3, 0.1, 0.6]),
+        "draft_rounds":     [len(STARTERS[t]) + b for t, b in zip(templates, bench)],
+    })
+
+
+def league_id_files(rng, leagues, out_dir):
+    """Overlapping crawled_leagues*.csv, old_leagues.csv and out_of_filter.csv."""
+    ids = leagues["league_id"].to_numpy()
+    for i, name in enumerate(["crawled_leagues.csv", "crawled_leagues2.csv",
+                              "crawled_leagues3.csv", "crawled_leagues4.csv"]):
+        share = 0.9 if i == 0 else 0.2
+        pd.DataFrame({"league_id": rng.choice(ids, size=int(len(ids) * share), replace=False)}) \
+          .to_csv(os.path.join(out_dir, name), index=False)
+    old = rng.choice(ids, size=max(len(ids) // 20, 1), replace=False)
+    pd.DataFrame({"league_id": old, "league_name": "synthetic", "season": 2024,
+                  "total_rosters": rng.choice([10, 12, 14], size=len(old))}) \
+      .to_csv(os.path.join(out_dir, "old_leagues.csv"), index=False)
+    pd.DataFrame({"league_id": rng.choice(ids, size=max(len(ids) // 50, 1), replace=False)}) \
+      .to_csv(os.path.join(out_dir, "out_of_filter.csv"), index=False)
+
+
+# ─── DRAFTS & MATCHUPS ──────────────────────────────────────────────────────
+def league_rows(rng, league, players):
+    """Draft picks and weekly matchup rows for one league."""
+    teams, rounds = int(league.num_teams), int(league.draft_rounds)
+    slots = [s for s in ast.literal_eval(league.roster_positions) if s != "BN"]
+    n_picks = teams * rounds
+
+    pick_no = np.arange(1, n_picks + 1)
+    rnd = (pick_no - 1) // teams
+    slot = np.where(rnd % 2 == 0, (pick_no - 1) % teams + 1, teams - (pick_no - 1) % teams)
+    board = draft(rng, players, slot, rounds, slots)
+    pids = players["player_id"].to_numpy()[board]
+    owners = rng.integers(10**17, 10**18, size=teams, dtype=np.int64).astype(str)
+    draft_id = str(int(league.league_id) + 1)
+
+    drafts = pd.DataFrame({
+        "league_id": league.league_id, "draft_id": draft_id, "draft_slot": slot,
+        "pick_no": pick_no, "is_keeper": None, "player_id": pids,
+        "position": players["position"].to_numpy()[board], "picked_by": owners[slot - 1],
+    })
+
+    # rosters in draft order; each slot starts its best eligible player on paper, the
+    # same lineup every week, and an empty slot is Sleeper's "0" scoring nothing
+    roster_of = [board[slot == r] for r in range(1, teams + 1)]
+    mean_pts = players["mean_pts"].to_numpy()
+    position = players["position"].to_numpy()
+    lineups = [lineup(slots, position[roster], mean_pts[roster]) for roster in roster_of]
+    rows = []
+    for week in WEEKS:
+        pairing = rng.permutation(teams) // 2 + 1
+        for r, (roster, starts) in enumerate(zip(roster_of, lineups)):
+            pts = np.round(np.maximum(mean_pts[roster] + rng.normal(0, 6, len(roster)), 0), 2)
+            ids = pids[slot == r + 1]
+            filled = starts >= 0
+            starters = np.where(filled, ids[starts], "0")
+            starter_pts = np.where(filled, pts[starts], 0.0)
+            rows.append((
+                league.league_id, week, r + 1, int(pairing[r]), float(starter_pts.sum()), None,
+                str(ids.tolist()), str(starters.tolist()), str(starter_pts.tolist()),
+                str(dict(zip(ids.tolist(), pts.tolist()))),
+            ))
+    matchups = pd.DataFrame(rows, columns=[
+        "league_id", "week", "roster_id", "matchup_id", "points", "custom_points",
+        "players", "starters", "starters_points", "players_points",
+    ])
+    return drafts, matchups
+
+
+def generate(n_leagues, out_dir, seed=0, chunk=CHUNK_LEAGUES):
+    """Write a full synthetic crawl of n_leagues into out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    players = player_universe(rng)
+    leagues = league_table(rng, n_leagues)
+
+    league_id_files(rng, leagues, out_dir)
+    leagues.to_csv(os.path.join(out_dir, "master_info.csv"), index=False)
+    players[["player_id", "position"]].assign(full_name="Player " + players["player_id"]) \
+        .to_csv(os.path.join(out_dir, "players_sleeper.csv"), index=False)
+
+    # written a chunk of leagues at a time so memory stays flat at any scale
+    for start in range(0, n_leagues, chunk):
+        parts = [league_rows(rng, lg, players) for lg in leagues.iloc[start:start + chunk].itertuples()]
+        mode, header = ("w", True) if start == 0 else ("a", False)
+        pd.concat([p[0] for p in parts]).to_csv(
+            os.path.join(out_dir, "master_drafts.csv"), index=False, mode=mode, header=header)
+        pd.concat([p[1] for p in parts]).to_csv(
+            os.path.join(out_dir, "master_matchups.csv"), index=False, mode=mode, header=header)
+        print(f"  {min(start + chunk, n_leagues)}/{n_leagues} leagues", end="\r")
+    print(f"\nWrote {n_leagues} synthetic leagues to {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Sleeper crawl.")
+    parser.add_argument("--leagues", type=int, default=1000)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.leagues, args.out, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Content digests shared by the stage runner (sleeper_ff) and the artifact cache.
+
+Digests are memoised in a plain dict keyed by repo-relative path, so callers
+can persist it as json and skip re-hashing files whose size and mtime are
+unchanged.
+"""
+import hashlib
+import os
+
+# ─── PROJECT BASE ────────────────────────────────────────────────────────────
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def file_digest(path, cache):
+    """sha256 of a file, reusing the cached digest while size and mtime are unchanged."""
+    if not os.path.isfile(path):
+        return "missing"
+    st = os.stat(path)
+    rel = os.path.relpath(path, BASE_DIR)
+    hit = cache.get(rel)
+    if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+        return hit[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    cache[rel] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+    return cache[rel][2]
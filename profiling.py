@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Opt-in profiling for pipeline scripts.
+
+Scripts mark named sections with `section(...)` / `@profiled` and count rows
+with `add_rows(n)`. With SLEEPER_FF_PROFILE unset those hooks are no-ops that
+return shared constants, so they can stay in hot loops. With it set, a run
+writes .sleeper_ff/profiles/<name>-<timestamp>.json (wall/CPU time and rows
+per section, peak RSS, run totals) plus a .folded stack dump from a wall-clock
+sampler. Load the .folded file into flamegraph.pl or speedscope.
+
+SLEEPER_FF_PROFILE is "1" or a comma list of extras:
+    alloc     tracemalloc peak + lines holding the most memory at exit (slows python-heavy code)
+    cprofile  also dump a cProfile .prof next to the report
+
+    sleeper-ff rapm --force --profile
+    sleeper-ff run crawl --profile alloc,cprofile
+    python profiling.py --profile alloc "4. cleaning_processing/matchups/rapm_type.py"
+"""
+import argparse
+import atexit
+import os
+import resource
+import runpy
+import signal
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+
+# ─── CONFIG ─────────────────────────────────────────────────────────────────
+BASE_DIR     = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR  = os.path.join(BASE_DIR, ".sleeper_ff", "profiles")
+ENV_VAR      = "SLEEPER_FF_PROFILE"
+NAME_ENV_VAR = "SLEEPER_FF_PROFILE_NAME"
+
+SAMPLE_SEC     = 0.01
+TOP_ALLOCATORS = 25
+
+OPTIONS = {o for o in os.environ.get(ENV_VAR, "").split(",") if o} - {"0"}
+ENABLED = bool(OPTIONS)
+
+
+def rss_mb():
+    # ru_maxrss is KiB on linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == "darwin" else 1024), 1)
+
+
+# ─── PROFILER ───────────────────────────────────────────────────────────────
+class Profiler:
+    """Section timings, a wall-clock stack sampler and optional tracemalloc / cProfile."""
+
+    def __init__(self, name, options):
+        self.name = name
+        self.options = options
+        self.stats = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "cpu_seconds": 0.0,
+                                          "rows": 0, "rss_mb_after": 0.0})
+        self.stacks = Counter()
+        self.open = {}          # thread id -> list of open section names
+        self.lock = threading.Lock()
+        self.started = time.strftime("%Y%m%d-%H%M%S")
+        self.wall, self.cpu = time.perf_counter(), time.process_time()
+        self.cprofile = None
+
+        if "alloc" in options:
+            import tracemalloc
+            tracemalloc.start()
+        if "cprofile" in options:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        # the sampler uses SIGALRM so HTTP waits and sleeps show up, not only CPU
+        if threading.current_thread() is threading.main_thread() and hasattr(signal, "setitimer"):
+            signal.signal(signal.SIGALRM, self._sample)
+            signal.setitimer(signal.ITIMER_REAL, SAMPLE_SEC, SAMPLE_SEC)
+
+    def _sample(self, signum, frame):
+        threads = {t.ident: t.name for t in threading.enumerate()}
+        for tid, f in sys._current_frames().items():
+            if tid == threading.get_ident():
+                f = frame
+            calls = []
+            while f is not None:
+                calls.append(f"{f.f_code.co_name} ({os.path.basename(f.f_code.co_filename)}:{f.f_lineno})")
+                f = f.f_back
+            sections = [f"[{s}]" for s in self.open.get(tid, [])]
+            self.stacks[";".join([threads.get(tid, str(tid))] + sections + calls[::-1])] += 1
+
+    def enter(self, name):
+        stack = self.open.setdefault(threading.get_ident(), [])
+        stack.append(name)
+        return "/".join(stack)
+
+    def exit(self, path, wall, cpu, rows):
+        self.open[threading.get_ident()].pop()
+        with self.lock:
+            s = self.stats[path]
+            s["calls"] += 1
+            s["seconds"] += wall
+            s["cpu_seconds"] += cpu
+            s["rows"] += rows
+            s["rss_mb_after"] = rss_mb()
+
+    def add_rows(self, n):
+        stack = self.open.get(threading.get_ident())
+        path = "/".join(stack) if stack else "(run)"
+        with self.lock:
+            self.stats[path]["rows"] += int(n)
+
+    def finish(self):
+        """Stop sampling and write <name>-<timestamp>.json / .folded (/ .prof)."""
+        import json
+        if hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stem = os.path.join(PROFILE_DIR, f"{self.name}-{self.started}")
+
+        report = {
+            "name":         self.name,
+            "argv":         sys.argv,
+            "started":      self.started,
+            "options":      sorted(self.options),
+            "seconds":      round(time.perf_counter() - self.wall, 4),
+            "cpu_seconds":  round(time.process_time() - self.cpu, 4),
+            "peak_rss_mb":  rss_mb(),
+            "rows":         sum(s["rows"] for s in self.stats.values()),
+            "sections":     {path: {k: round(v, 4) if isinstance(v, float) else v for k, v in s.items()}
+                             for path, s in sorted(self.stats.items())},
+            "stacks":       stem + ".folded",
+        }
+        if "alloc" in self.options:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                tracemalloc.Filter(False, __file__),
+            ])
+            report["py_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+            report["top_allocators"] = [
+                {"line": f"{st.traceback[0].filename}:{st.traceback[0].lineno}",
+                 "mb": round(st.size / 2**20, 2), "blocks": st.count}
+                for st in snapshot.statistics("lineno")[:TOP_ALLOCATORS]
+            ]
+            tracemalloc.stop()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(stem + ".prof")
+            report["cprofile"] = stem + ".prof"
+
+        with open(stem + ".folded", "w") as f:
+            f.writelines(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+        with open(stem + ".json", "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"profile: {stem}.json", file=sys.stderr)
+        return report
+
+
+class _Section:
+    __slots__ = ("name", "path", "rows", "wall", "cpu")
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.path = _PROFILER.enter(self.name)
+        self.wall, self.cpu = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        _PROFILER.exit(self.path, time.perf_counter() - self.wall, time.process_time() - self.cpu, self.rows)
+        return False
+
+
+# ─── HOOKS ──────────────────────────────────────────────────────────────────
+# bound once at import: when profiling is off they never touch a clock
+_PROFILER = None
+_NULL = nullcontext()
+
+
+def _section_off(name, rows=0):
+    return _NULL
+
+
+def _section_on(name, rows=0):
+    return _Section(name, rows)
+
+
+def _add_rows_off(n):
+    pass
+
+
+def _add_rows_on(n):
+    _PROFILER.add_rows(n)
+
+
+def profiled(name=None):
+    """Decorator form of section(); returns the function untouched when profiling is off."""
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+        label = name or fn.__name__
+
+        def inner(*args, **kwargs):
+            with _Section(label, 0):
+                return fn(*args, **kwargs)
+        inner.__name__, inner.__doc__, inner.__wrapped__ = fn.__name__, fn.__doc__, fn
+        return inner
+    return wrap
+
+
+# as __main__ (the wrapper below) this copy stays off; the script's `import profiling` owns the run
+if ENABLED and __name__ != "__main__":
+    _PROFILER = Profiler(os.environ.get(NAME_ENV_VAR)
+                         or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0], OPTIONS)
+    atexit.register(_PROFILER.finish)
+    section, add_rows = _section_on, _add_rows_on
+else:
+    section, add_rows = _section_off, _add_rows_off
+
+
+# ─── WRAPPER ────────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Run a script with profiling on.")
+    parser.add_argument("--profile", default=os.environ.get(ENV_VAR) or "1",
+                        help='"1" or extras: alloc,cprofile')
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    # this file is __main__ here; the scripts' `import profiling` must get an enabled copy
+    os.environ[ENV_VAR] = args.profile
+    os.environ.setdefault(NAME_ENV_VAR, os.path.splitext(os.path.basename(args.script))[0])
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    sys.argv = [args.script] + args.args
+    import profiling
+    with profiling.section("main"):
+        runpy.run_path(args.script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
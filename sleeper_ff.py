@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""sleeper-ff: run the pipeline stages as a DAG.
+
+A stage is skipped when the content hashes of its inputs and of its code
+(the script plus any modules it reads its config from) match the last
+successful run and its outputs still exist. Stages whose upstream stages
+are done run in parallel.
+
+    sleeper-ff list
+    sleeper-ff run all --jobs 4
+    sleeper-ff draft-value --upstream
+    sleeper-ff rapm --force --profile alloc
+    sleeper-ff run crawl --seasons 2022 2023 2024 2025
+"""
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from digests import file_digest
+
+# ─── PROJECT BASE ────────────────────────────────────────────────────────────
+BASE_DIR   = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR  = os.path.join(BASE_DIR, ".sleeper_ff")
+STATE_JSON = os.path.join(STATE_DIR, "state.json")
+LOG_DIR    = os.path.join(STATE_DIR, "logs")
+PROFILER   = os.path.join(BASE_DIR, "profiling.py")
+
+# ─── STAGES ──────────────────────────────────────────────────────────────────
+# paths are relative to BASE_DIR; directories and globs hash every file inside.
+# upstream edges are derived: a stage depends on any stage that outputs one of its inputs.
+LEAGUE_IDS = "2. league_ids"
+RAW = "3. raw_data"
+OUT = "6. outputs"
+ANALYSIS_COMMON = ["5. analysis/common.py"]
+CRAWL_COMMON = ["1. scripts/seasons.py"]
+
+STAGES = {
+    "league-ids": {
+        "script":  "1. scripts/s1_get_league_ids.py",
+        # seed_leagues.csv comes out of user-graph, which needs this stage's edges; hashing it
+        # here rather than declaring it an input keeps the DAG acyclic
+        "code":    CRAWL_COMMON + ["1. scripts/user_graph.py", f"{LEAGUE_IDS}/seed_leagues.csv"],
+        "env":     ["SLEEPER_FF_SEASONS"],
+        "inputs":  [f"{LEAGUE_IDS}/crawled_leagues2.csv"],
+        "outputs": [f"{LEAGUE_IDS}/crawled_leagues3.csv", f"{LEAGUE_IDS}/user_league_edges.csv"],
+    },
+    "league-info": {
+        "script":  "1. scripts/s2_get_league_info.py",
+        "code":    CRAWL_COMMON,
+        "env":     ["SLEEPER_FF_SEASONS"],
+        "inputs":  [f"{LEAGUE_IDS}/crawled_leagues*.csv", f"{LEAGUE_IDS}/old_leagues.csv",
+                    f"{LEAGUE_IDS}/out_of_filter.csv"],
+        "outputs": [f"{LEAGUE_IDS}/master_league_ids.csv", f"{LEAGUE_IDS}/out_of_filter.csv",
+                    f"{RAW}/info", f"{RAW}/drafts"],
+    },
+    "matchups": {
+        "script":  "1. scripts/s3_get_matchup_info.py",
+        "code":    CRAWL_COMMON,
+        "env":     ["SLEEPER_FF_SEASONS"],
+        "inputs":  [f"{LEAGUE_IDS}/master_league_ids.csv", f"{LEAGUE_IDS}/out_of_filter.csv"],
+        "outputs": [f"{RAW}/matchups"],
+    },
+    "user-graph": {
+        "script":  "1. scripts/user_graph.py",
+        "code":    CRAWL_COMMON,
+        "env":     ["SLEEPER_FF_SEASONS"],
+        "inputs":  [f"{LEAGUE_IDS}/user_league_edges.csv", f"{LEAGUE_IDS}/out_of_filter.csv",
+                    f"{RAW}/info", f"{RAW}/master_info.csv"],
+        "outputs": [f"{LEAGUE_IDS}/user_graph.npz", f"{LEAGUE_IDS}/seed_leagues.csv"],
+    },
+    "merge": {
+        "script":  "4. cleaning_processing/merge_raw_data.py",
+        "inputs":  [f"{RAW}/info", f"{RAW}/drafts", f"{RAW}/matchups"],
+        "outputs": [f"{RAW}/master_info.csv", f"{RAW}/master_drafts.csv", f"{RAW}/master_matchups.csv"],
+    },
+    "rapm": {
+        "script":  "4. cleaning_processing/matchups/rapm_type.py",
+        "code":    ["4. cleaning_processing/matchups/matchup_stream.py", "artifact_cache.py", "digests.py"],
+        "inputs":  [f"{RAW}/master_matchups.csv", f"{RAW}/players_sleeper.csv"],
+        "outputs": [f"{RAW}/starter_facts.csv"],
+    },
+    "positional-importance": {
+        "script":  "5. analysis/positional_importance.py",
+        "code":    ANALYSIS_COMMON,
+        "inputs":  [f"{RAW}/master_info.csv", f"{RAW}/master_matchups.csv"],
+        "outputs": [f"{OUT}/slot_importance.csv", f"{OUT}/slot_importance_by_format.csv"],
+    },
+    "draft-value": {
+        "script":  "5. analysis/draft_value.py",
+        "code":    ANALYSIS_COMMON,
+        "inputs":  [f"{RAW}/master_info.csv", f"{RAW}/master_drafts.csv", f"{RAW}/master_matchups.csv"],
+        "outputs": [f"{OUT}/pick_values.csv", f"{OUT}/pick_value_curve.csv"],
+    },
+    "codraft": {
+        "script":  "5. analysis/codraft.py",
+        "code":    ANALYSIS_COMMON,
+        "inputs":  [f"{RAW}/master_info.csv", f"{RAW}/master_drafts.csv"],
+        "outputs": [f"{OUT}/codraft_top_partners.csv", f"{OUT}/player_reaches.csv"],
+    },
+    "draft-features": {
+        "script":  "5. analysis/draft_features.py",
+        "code":    ANALYSIS_COMMON,
+        "inputs":  [f"{RAW}/master_info.csv", f"{RAW}/master_drafts.csv"],
+        "outputs": [f"{OUT}/draft_features.npz"],
+    },
+    "adp": {
+        "script":  "5. analysis/adp_sketch.py",
+        "code":    ANALYSIS_COMMON,
+        "inputs":  [f"{RAW}/master_info.csv", f"{RAW}/master_drafts.csv"],
+        "outputs": [f"{RAW}/adp_sketches.npz", f"{OUT}/adp_by_format.csv"],
+    },
+    "availability": {
+        "script":  "5. analysis/availability.py",
+        "code":    ANALYSIS_COMMON + ["5. analysis/draft_features.py", "5. analysis/draft_value.py"],
+        "inputs":  [f"{RAW}/master_info.csv", f"{RAW}/master_drafts.csv", f"{RAW}/master_matchups.csv"],
+        "outputs": [f"{OUT}/availability.npz"],
+    },
+    "league-formats": {
+        "script":  "5. analysis/league_formats.py",
+        "code":    ANALYSIS_COMMON,
+        "inputs":  [f"{RAW}/master_info.csv", f"{RAW}/drafts"],
+        "outputs": [f"{OUT}/format_index.npz", f"{OUT}/league_formats.csv"],
+    },
+    "draft-sequences": {
+        "script":  "5. analysis/draft_sequences.py",
+        "code":    ANALYSIS_COMMON + ["5. analysis/draft_features.py"],
+        "inputs":  [f"{RAW}/master_drafts.csv", f"{RAW}/master_matchups.csv"],
+        "outputs": [f"{OUT}/sequence_trie.npz"],
+    },
+    "trade-values": {
+        "script":  "5. analysis/trade_values.py",
+        "code":    ANALYSIS_COMMON + ["5. analysis/league_formats.py",
+                                      "4. cleaning_processing/matchups/matchup_stream.py"],
+        "inputs":  [f"{RAW}/values", f"{RAW}/master_info.csv", f"{RAW}/master_drafts.csv",
+                    f"{RAW}/master_matchups.csv"],
+        "outputs": [f"{RAW}/value_store.npz", f"{OUT}/draft_values.csv"],
+    },
+    "lineup-efficiency": {
+        "script":  "5. analysis/lineup_efficiency.py",
+        "code":    ANALYSIS_COMMON + ["4. cleaning_processing/matchups/matchup_stream.py"],
+        "inputs":  [f"{RAW}/master_info.csv", f"{RAW}/master_matchups.csv", f"{RAW}/players_sleeper.csv",
+                    f"{RAW}/master_drafts.csv"],
+        "outputs": [f"{OUT}/lineup_efficiency.csv", f"{OUT}/lineup_efficiency_by_manager.csv"],
+    },
+    "schedule-luck": {
+        "script":  "5. analysis/schedule_luck.py",
+        "code":    ANALYSIS_COMMON + ["4. cleaning_processing/matchups/matchup_stream.py"],
+        "inputs":  [f"{RAW}/master_matchups.csv"],
+        "outputs": [f"{OUT}/schedule_luck.csv"],
+    },
+}
+
+GROUPS = {
+    "all":      list(STAGES),
+    "crawl":    ["league-ids", "league-info", "matchups", "merge", "user-graph"],
+    "analysis": [s for s in STAGES if STAGES[s]["script"].startswith(("4.", "5.")) and s != "merge"],
+}
+
+
+# ─── GRAPH ───────────────────────────────────────────────────────────────────
+def upstream(name):
+    """Direct upstream stages: those writing any of this stage's inputs."""
+    inputs = STAGES[name]["inputs"]
+
+    def feeds(other):
+        return any(o == i or fnmatch.fnmatch(o, i)
+                   for i in inputs for o in STAGES[other]["outputs"])
+
+    return [s for s in STAGES if s != name and feeds(s)]
+
+
+def with_upstream(names):
+    seen, todo = set(), list(names)
+    while todo:
+        name = todo.pop()
+        if name not in seen:
+            seen.add(name)
+            todo += upstream(name)
+    return [s for s in STAGES if s in seen]
+
+
+# ─── HASHING ─────────────────────────────────────────────────────────────────
+def expand(rel):
+    """Files behind a declared path: the file itself, a directory's files, or a glob."""
+    path = os.path.join(BASE_DIR, rel)
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "**", "*"), recursive=True))
+    return sorted(glob.glob(path)) if any(c in rel for c in "*?[") else [path]
+
+
+def stage_digest(name, cache):
+    stage = STAGES[name]
+    parts = {"config": stage.get("config")}
+    # env vars a stage reads (e.g. the crawl's seasons) count as inputs too
+    parts["env"] = {k: os.environ.get(k) for k in stage.get("env", [])}
+    for rel in [stage["script"]] + stage.get("code", []) + stage["inputs"]:
+        files = expand(rel)
+        parts[rel] = {os.path.relpath(f, BASE_DIR): file_digest(f, cache)
+                      for f in files if not os.path.isdir(f)} or "missing"
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def outputs_exist(name):
+    return all(os.path.exists(os.path.join(BASE_DIR, o)) for o in STAGES[name]["outputs"])
+
+
+# ─── STATE ───────────────────────────────────────────────────────────────────
+def load_state():
+    if os.path.exists(STATE_JSON):
+        with open(STATE_JSON) as f:
+            return json.load(f)
+    return {"files": {}, "stages": {}}
+
+
+def save_state(state):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = STATE_JSON + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, STATE_JSON)
+
+
+def is_fresh(name, state):
+    last = state["stages"].get(name, {})
+    return last.get("digest") == stage_digest(name, state["files"]) and outputs_exist(name)
+
+
+# ─── RUNNER ──────────────────────────────────────────────────────────────────
+def run_stage(name, extra_env=None):
+    """Run one stage's script in its own process, output to .sleeper_ff/logs/<stage>.log."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f"{name}.log")
+    env = dict(os.environ, **(extra_env or {}))
+    cmd = [sys.executable, os.path.join(BASE_DIR, STAGES[name]["script"])]
+    if env.get("SLEEPER_FF_PROFILE"):
+        # report lands in .sleeper_ff/profiles/<stage>-<timestamp>.json
+        env["SLEEPER_FF_PROFILE_NAME"] = name
+        cmd.insert(1, PROFILER)
+    t0 = time.perf_counter()
+    with open(log_path, "w") as log:
+        proc = subprocess.run(cmd, cwd=BASE_DIR, stdout=log, stderr=subprocess.STDOUT, env=env)
+    return proc.returncode, time.perf_counter() - t0, log_path
+
+
+def run(names, force=False, jobs=1, dry_run=False, extra_env=None):
+    """Run the selected stages in dependency order, skipping fresh ones."""
+    state = load_state()
+    selected = set(names)
+    deps = {s: [u for u in upstream(s) if u in selected] for s in names}
+    done, failed, running = set(), set(), {}
+
+    def ready(s):
+        return s not in done and s not in failed and s not in running and all(u in done for u in deps[s])
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        while True:
+            progressed = False
+            for s in [s for s in names if ready(s)]:
+                progressed = True
+                if not force and is_fresh(s, state):
+                    done.add(s)
+                    print(f"✔ {s}: up to date")
+                elif dry_run:
+                    done.add(s)
+                    print(f"▶ {s}: would run")
+                else:
+                    print(f"▶ {s}: running")
+                    running[s] = pool.submit(run_stage, s, extra_env)
+            # stages whose upstream failed never get submitted
+            for s in names:
+                if s not in done and s not in failed and s not in running and any(u in failed for u in deps[s]):
+                    failed.add(s)
+                    print(f"⏩ {s}: upstream failed")
+            if not running:
+                if progressed:
+                    continue
+                break
+
+            finished, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+            for s in [s for s, fut in running.items() if fut in finished]:
+                code, secs, log_path = running.pop(s).result()
+                if code == 0:
+                    # hash after the run so stages that rewrite their own inputs stay fresh
+                    state["stages"][s] = {"digest": stage_digest(s, state["files"]),
+                                          "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+                                          "seconds": round(secs, 2)}
+                    save_state(state)
+                    done.add(s)
+                    print(f"✔ {s}: done in {secs:.1f}s")
+                else:
+                    failed.add(s)
+                    print(f"✖ {s}: exit {code}, see {log_path}")
+
+    save_state(state)
+    return 0 if not failed else 1
+
+
+def resolve(targets, include_upstream):
+    names = []
+    for t in targets:
+        for s in GROUPS.get(t, [t]):
+            if s not in STAGES:
+                raise SystemExit(f"unknown stage or group: {t}")
+            names.append(s)
+    if include_upstream:
+        names = with_upstream(names)
+    return [s for s in STAGES if s in set(names)]
+
+
+def list_stages():
+    state = load_state()
+    for s in STAGES:
+        ups = ", ".join(upstream(s)) or "-"
+        status = "fresh" if is_fresh(s, state) else "stale"
+        print(f"{s:<24}{status:<8}{STAGES[s]['script']}  ← {ups}")
+    save_state(state)
+
+
+# ─── CLI ─────────────────────────────────────────────────────────────────────
+def add_run_args(p):
+    p.add_argument("--force", action="store_true", help="run even if inputs are unchanged")
+    p.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                   help="stages to run at once")
+    p.add_argument("--upstream", action="store_true", help="also run stale upstream stages")
+    p.add_argument("--dry-run", action="store_true", help="only print what would run")
+    p.add_argument("--seasons", nargs="+", type=int, metavar="YEAR",
+                   help="seasons for the crawl stages (default: $SLEEPER_FF_SEASONS or 2024)")
+    p.add_argument("--profile", nargs="?", const="1", metavar="EXTRAS",
+                   help="write a profile report per stage to .sleeper_ff/profiles "
+                        "(extras: alloc,cprofile); fresh stages still skip without --force")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="sleeper-ff", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="show stages, their upstream and whether they are fresh")
+    p = sub.add_parser("run", help="run stages or groups (all, crawl, analysis)")
+    p.add_argument("targets", nargs="+")
+    add_run_args(p)
+    for name in STAGES:
+        add_run_args(sub.add_parser(name, help=f"run {STAGES[name]['script']}"))
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "list":
+        list_stages()
+        return 0
+    if args.seasons:
+        # set here, not via extra_env, so the crawl stages' digests see it too
+        os.environ["SLEEPER_FF_SEASONS"] = " ".join(map(str, args.seasons))
+    targets = args.targets if args.command == "run" else [args.command]
+    names = resolve(targets, args.upstream)
+    extra_env = {"SLEEPER_FF_PROFILE": args.profile} if args.profile else None
+    return run(names, force=args.force, jobs=args.jobs, dry_run=args.dry_run, extra_env=extra_env)
+
+
+if __name__ == "__main__":
+    sys.exit(main())